@@ -7,6 +7,12 @@ from transformers import pipeline
 from sentence_transformers import SentenceTransformer, util
 from serpapi import GoogleSearch
 from datetime import datetime
+import os
+import sys
+
+# The scoring engine is shared with the Streamlit app
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "streamlit_app"))
+from scoring_engine import ScoringEngine, WEIGHTS, combine_domain_trust
 
 
 
@@ -123,16 +129,27 @@ def get_google_search_popularity(url):
         return 50  # Default mid-trust if API request fails
 
 # Domain trust function by combining scores above:
+def get_domain_scores(url):
+    """
+    Return the safety, domain age, and popularity scores of the url's domain.
+    """
+    return get_google_safety_score(url), get_domain_age_score(url), get_google_search_popularity(url)
+
 def get_domain_trust_score(url):
     """
     Combine Google Safe Browsing, Domain Age, and Search Popularity to compute domain trust.
     Return a final combined scores of safety, age, popularity with the weights of 40%, 30%, 30% respectively.
     """
-    safety_score = get_google_safety_score(url)
-    domain_age_score = get_domain_age_score(url)
-    popularity_score = get_google_search_popularity(url)
-    final_trust_score = (safety_score * 0.4) + (domain_age_score * 0.3) + (popularity_score * 0.3)
-    return round(final_trust_score, 2)
+    return combine_domain_trust(*get_domain_scores(url))
+
+
+
+
+
+
+# PAGE CONTENT (fetched once and shared by the relevance and bias scores):
+def fetch_page(url):
+    return requests.get(url, timeout=5, headers={"User-Agent": "Mozilla/5.0"})
 
 
 
@@ -140,12 +157,13 @@ def get_domain_trust_score(url):
 
 
 # CONTENT RELEVANCE SCORE:
-def get_content_relevance_score(url, query):
+def get_content_relevance_score(url, query, page=None):
     """
     Check content relevance using NLP similarity score.
     Return o to 100 where 100 means it is completely relevant.
     """
-    page = requests.get(url)
+    if page is None:
+        page = fetch_page(url)
     soup = BeautifulSoup(page.text, "html.parser")
     text = " ".join([p.get_text() for p in soup.find_all("p")])[:2000]
     embeddings1 = similarity_model.encode(query, convert_to_tensor=True)
@@ -194,7 +212,7 @@ def get_fact_check_score(query):
 
 
 # BIAS SCORE:
-def get_bias_score(url):
+def get_bias_score(url, page=None):
     """
     Analyze text bias using Hugging Face sentiment model.
     Return bias score from 0 to 100.
@@ -203,7 +221,7 @@ def get_bias_score(url):
         if not url.strip():
             return "Error: URL is empty"
         # Fetch page content
-        response = requests.get(url, timeout=5, headers={"User-Agent": "Mozilla/5.0"})
+        response = page if page is not None else fetch_page(url)
         if response.status_code != 200:
             return f"Error: Unable to access URL (HTTP {response.status_code})"
         soup = BeautifulSoup(response.text, "html.parser")
@@ -259,13 +277,8 @@ def get_citation_score(query):
 
 
 # WEIGHTS MAPPING:
-WEIGHTS = {
-    "domain_trust": 0.275,       # 27.5%
-    "content_relevance": 0.275,  # 27.5%
-    "fact_check": 0.275,         # 27.5%
-    "bias": 0.125,               # 12.5%
-    "citation": 0.05             # 05.0%
-}
+# Declared with the signals in streamlit_app/scoring_engine.py:
+# domain_trust 27.5%, content_relevance 27.5%, fact_check 27.5%, bias 12.5%, citation 5%
 
 
 
@@ -279,45 +292,12 @@ def validate_url(prompt, url):
 
     Each individual score range from 0 to 100.
 
-    Then, weight is applied according to WEIGHTS dict above to calculate the final score.
+    Then, weight is applied according to WEIGHTS to calculate the final score.
+    The signals run through the shared scoring engine, which fetches the page once
+    and runs independent signals in parallel.
     """
-    domain_trust_score = get_domain_trust_score(url)
-    weighted_domain_trust_score = round(domain_trust_score * WEIGHTS['domain_trust'], 2)
-
-    content_relevance_score = get_content_relevance_score(url, prompt)
-    weighted_content_relevance_score = round(content_relevance_score * WEIGHTS['content_relevance'], 2)
-
-    fact_check_score = get_fact_check_score(prompt)
-    weighted_fact_check_score = round(fact_check_score * WEIGHTS['fact_check'], 2)
-
-    bias_score = get_bias_score(url)
-    weighted_bias_score = round(bias_score * WEIGHTS['bias'], 2)
-
-    citation_score = get_citation_score(prompt)
-    weighted_citation_score = round(citation_score * WEIGHTS['citation'], 2)
-
-    final_score = round(
-        weighted_domain_trust_score +
-        weighted_content_relevance_score +
-        weighted_fact_check_score +
-        weighted_bias_score +
-        weighted_citation_score
-    , 2)
-
-    return {
-        "url": url,
-        "domain_trust": domain_trust_score,
-        "w_domain_trust": weighted_domain_trust_score,
-        "relevance_score": content_relevance_score,
-        "w_relevance_score": weighted_content_relevance_score,
-        "fact_check": fact_check_score,
-        "w_fact_check": weighted_fact_check_score,
-        "bias_score": bias_score,
-        "w_bias_score": weighted_bias_score,
-        "citation_score": citation_score,
-        "w_citation_score": weighted_citation_score,
-        "final_score": final_score
-    }
+    engine = ScoringEngine(sys.modules[__name__])
+    return engine.compile_scores(url, engine.run(prompt, url))
 
 
 
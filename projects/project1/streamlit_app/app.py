@@ -1,25 +1,196 @@
+import csv
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import streamlit as st
 from credibility_checker import CredibilityChecker
 
-checker = CredibilityChecker()
+
+# Load the models once per server instead of on every rerun
+@st.cache_resource
+def get_checker():
+    return CredibilityChecker()
+
+
+# (result, cached at) keyed by (prompt, url), shared across reruns and sessions, with the lock guarding it
+@st.cache_resource
+def get_result_cache():
+    return {}, threading.Lock()
+
+
+checker = get_checker()
+result_cache, result_cache_lock = get_result_cache()
+
+MAX_WORKERS = 8
+MAX_CACHED_RESULTS = 10000
+# A cached result is rescored after this long, like the domain signals it was built from
+RESULT_CACHE_TTL = checker.DOMAIN_CACHE_TTL
+# URLs of a list that are prefetched before the button is pressed, the rest are fetched when checked
+MAX_PREFETCH_URLS = 20
+
+SIGNAL_LABELS = {
+    "domain_trust": "Domain trust",
+    "content_relevance": "Content relevance",
+    "fact_check": "Fact check",
+    "bias": "Bias",
+    "citation": "Citations"
+}
 
 st.title("🌐 Website Credibility Checker")
 
+# Near-duplicate prompt cache for fact-check and citation lookups
+prompt_cache_stats = checker.prompt_cache.report()
+st.sidebar.write("**Prompt cache**")
+st.sidebar.write(f"Hit rate: {prompt_cache_stats['hit_rate']} ({prompt_cache_stats['hits']} of {prompt_cache_stats['lookups']})")
+st.sidebar.write(f"False-reuse rate: {prompt_cache_stats['false_reuse_rate']} ({prompt_cache_stats['audits']} audited)")
+
+# Signals skipped while the checker is over its latency SLO (see load_shedder.py)
+load_stats = checker.load_shedder.stats()
+st.sidebar.write("**Load**")
+st.sidebar.write(f"p95: {load_stats['p95']}s, {load_stats['in_flight']} checks in flight")
+if load_stats["shed"]:
+    st.sidebar.write(f"Skipping: {', '.join(SIGNAL_LABELS[signal] for signal in load_stats['shed'])}")
+
+
+def read_urls(pasted, uploaded):
+    # One URL per line, plus the first column (or a "url" column) of an uploaded CSV
+    urls = [line.strip() for line in pasted.splitlines() if line.strip()]
+    if uploaded is not None:
+        rows = list(csv.reader(io.StringIO(uploaded.getvalue().decode("utf-8-sig"))))
+        column = 0
+        if rows and "url" in [cell.strip().lower() for cell in rows[0]]:
+            column = [cell.strip().lower() for cell in rows[0]].index("url")
+            rows = rows[1:]
+        urls += [row[column].strip() for row in rows if len(row) > column and row[column].strip()]
+    # Drop duplicates but keep the order
+    return list(dict.fromkeys(urls))
+
+
+def remember(prompt, url, result):
+    # Results scored under load or with default scores for unavailable services are not kept,
+    # so the full score is computed once load drops or the services recover
+    if result['degraded'] or result['fallbacks']:
+        return
+    with result_cache_lock:
+        result_cache.pop((prompt, url), None)
+        # Evict the oldest entries once the cache is full
+        while len(result_cache) >= MAX_CACHED_RESULTS:
+            result_cache.pop(next(iter(result_cache)))
+        result_cache[(prompt, url)] = (result, time.time())
+
+
+def recall(prompt, url):
+    with result_cache_lock:
+        entry = result_cache.get((prompt, url))
+        if entry is None:
+            return None
+        result, cached_at = entry
+        if time.time() - cached_at >= RESULT_CACHE_TTL:
+            del result_cache[(prompt, url)]
+            return None
+        return result
+
+
+def score_url(prompt, url):
+    # One failing url (unreachable host, unreadable page, ...) becomes an error row instead of failing the batch
+    try:
+        result = checker.credibility_score(prompt, url)
+    except Exception as e:
+        return {"error": str(e)}
+    remember(prompt, url, result)
+    return result
+
+
+def check_urls(prompt, urls):
+    # Score only the urls that are not cached yet, concurrently
+    results = {url: recall(prompt, url) for url in urls}
+    missing = [url for url in urls if results[url] is None]
+    if missing:
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(missing))) as executor:
+            for url, result in zip(missing, executor.map(lambda u: score_url(prompt, u), missing)):
+                results[url] = result
+    return [{"url": url, **results[url]} for url in urls]
+
+
+def show_fallbacks(result):
+    if result['fallbacks']:
+        st.warning(f"⚠️ Default scores used for unavailable services: {', '.join(result['fallbacks'])}")
+    if result['degraded']:
+        st.warning(f"⚠️ High load, scored without: {', '.join(SIGNAL_LABELS[signal] for signal in result['degraded'])}")
+
+
 prompt = st.text_input("🔎 Enter your query (e.g., 'Is climate change real?'):")
-url = st.text_input("🌍 Enter a website URL:")
-
-# Submit Button
-if st.button("Check Credibility"):
-    if prompt and url:
-        with st.spinner("Analyzing... Please wait ⏳"):
-            result = checker.credibility_score(prompt, url)
-        # Display the results
-        st.success("✅ Credibility Score Calculated!")
-        st.write(f"**Score:** {result['score']} / 100")
-        st.write(f"**Ratings:** {result['ratings']}")
-        st.write(f"**Explanation:** {result['explanation']}")
-    else:
-        st.warning("⚠️ Please enter both a query and a URL.")
+mode = st.radio("Mode", ["Single URL", "Multiple URLs"], horizontal=True)
+
+if mode == "Multiple URLs":
+    pasted = st.text_area("🌍 Enter website URLs (one per line):")
+    uploaded = st.file_uploader("📄 Or upload a CSV of URLs:", type="csv")
+    urls = read_urls(pasted, uploaded)
+    # Start fetching domain scores and pages as soon as the URLs are entered, before the button is pressed;
+    # only when the list changed, since any widget reruns the script
+    if urls != st.session_state.get("prefetched"):
+        st.session_state["prefetched"] = urls
+        checker.prefetch(urls[:MAX_PREFETCH_URLS])
+    if st.button("Check Credibility"):
+        if prompt and urls:
+            with st.spinner(f"Analyzing {len(urls)} URLs... Please wait ⏳"):
+                st.session_state["batch"] = (prompt, check_urls(prompt, urls))
+        else:
+            st.warning("⚠️ Please enter a query and at least one URL.")
+    # Keep showing the last table when other widgets cause a rerun
+    if "batch" in st.session_state:
+        batch_prompt, results = st.session_state["batch"]
+        st.success(f"✅ Checked {len(results)} URLs for: {batch_prompt}")
+        # Click a column header to sort
+        st.dataframe(results, use_container_width=True, hide_index=True)
+
+else:
+    url = st.text_input("🌍 Enter a website URL:")
+    # Submit Button
+    if st.button("Check Credibility"):
+        result = recall(prompt, url) if prompt and url else None
+        if result is not None:
+            st.success("✅ Credibility Score Calculated!")
+            st.write(f"**Score:** {result['score']} / 100")
+            st.write(f"**Ratings:** {result['ratings']}")
+            st.write(f"**Explanation:** {result['explanation']}")
+            show_fallbacks(result)
+        elif prompt and url:
+            # One placeholder per signal, filled in as soon as that signal finishes
+            status = st.empty()
+            status.info("Analyzing... Please wait ⏳")
+            total = st.empty()
+            rows = {signal: st.empty() for signal in SIGNAL_LABELS}
+            for signal, label in SIGNAL_LABELS.items():
+                rows[signal].write(f"{label}: ⏳")
+
+            scores = {}
+            fallbacks = []
+            partial_score = 0
+            for signal, score, weighted_score in checker.iter_validate_url(prompt, url, fallbacks):
+                scores[signal] = score
+                partial_score += weighted_score
+                rows[signal].write(f"{SIGNAL_LABELS[signal]}: **{score}** (weighted {weighted_score})")
+                total.write(f"**Score so far:** {round(partial_score, 2)} / 100 "
+                            f"({len(scores)} of {len(SIGNAL_LABELS)} signals)")
+
+            for signal in SIGNAL_LABELS.keys() - scores.keys():
+                rows[signal].write(f"{SIGNAL_LABELS[signal]}: skipped (high load)")
+            scores = checker.compile_scores(url, scores["domain_trust"], scores["content_relevance"],
+                                            scores["fact_check"], scores.get("bias"), scores.get("citation"),
+                                            fallbacks)
+            result = checker.summarize_scores(scores)
+            remember(prompt, url, result)
+            # Display the results
+            status.success("✅ Credibility Score Calculated!")
+            total.write(f"**Score:** {result['score']} / 100")
+            st.write(f"**Ratings:** {result['ratings']}")
+            st.write(f"**Explanation:** {result['explanation']}")
+            show_fallbacks(result)
+        else:
+            st.warning("⚠️ Please enter both a query and a URL.")
 
 
 
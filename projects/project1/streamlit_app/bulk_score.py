@@ -0,0 +1,168 @@
+# Bulk credibility scorer for offline datasets of (prompt, url) rows.
+#
+# Rows are streamed from a CSV or JSONL file, scored concurrently with a bounded
+# number of rows in flight, and appended to a JSONL output file as soon as each
+# one finishes. The output file doubles as the checkpoint: re-running the same
+# command skips every row that already has a result.
+#
+# For analytics, give a .parquet or .arrow output instead: results are then written
+# in columnar batches by result_sink.ResultSink (such files cannot be resumed).
+#
+# Run file using terminal:
+# python bulk_score.py rows.csv results.jsonl --concurrency 8
+# Faster, calibrated relevance and bias models (see model_profiles.py):
+# python bulk_score.py rows.csv results.jsonl --profile fast
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from credibility_checker import CredibilityChecker
+
+
+def read_rows(path, prompt_column="prompt", url_column="url"):
+    """
+    Yield (row, prompt, url) one line at a time from a CSV (with header) or JSONL file.
+    row is the 0-based position of the record in the file and identifies it on resume.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".csv"):
+            records = csv.DictReader(f)
+        else:
+            records = (json.loads(line) for line in f if line.strip())
+        for row, record in enumerate(records):
+            yield row, record[prompt_column], record[url_column]
+
+
+def load_checkpoint(path, retry_errors=False):
+    """
+    Return the set of rows already written to the output file.
+    A trailing partial line left by an interrupted run is truncated first. With retry_errors,
+    the error lines are removed from the file, so every row has a single record once re-scored.
+    """
+    done = set()
+    if not os.path.exists(path):
+        return done
+    errors = 0
+    with open(path, "rb+") as f:
+        end_of_last_line = 0
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            end_of_last_line += len(line)
+            record = json.loads(line)
+            if retry_errors and "error" in record:
+                errors += 1
+                continue
+            done.add(record["row"])
+        f.truncate(end_of_last_line)
+    if errors:
+        # Rewritten under a temporary name and renamed, so a crash leaves either file intact
+        with open(path, "rb") as f, open(path + ".tmp", "wb") as out:
+            for line in f:
+                if "error" not in json.loads(line):
+                    out.write(line)
+        os.replace(path + ".tmp", path)
+        print(f"Retrying {errors} rows that failed last time", file=sys.stderr)
+    return done
+
+
+def score_row(checker, row, prompt, url):
+    try:
+        result = checker.credibility_score(prompt, url)
+        return {"row": row, "prompt": prompt, "url": url, **result}
+    except Exception as e:
+        return {"row": row, "prompt": prompt, "url": url, "error": str(e)}
+
+
+class JsonlWriter:
+    # Appends one JSON line per result, flushed so a crash loses at most the rows still in flight
+    def __init__(self, path):
+        self.file = open(path, "a", encoding="utf-8")
+
+    def write(self, result):
+        self.file.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def open_output(path):
+    if not path.endswith((".parquet", ".arrow")):
+        return JsonlWriter(path)
+    if os.path.exists(path):
+        raise FileExistsError(f"{path} already exists; columnar output cannot be resumed, "
+                              "use a .jsonl output and convert it with result_sink.py")
+    # Imported here so JSONL runs do not need pyarrow
+    from result_sink import ResultSink
+    return ResultSink(path)
+
+
+def bulk_score(input_path, output_path, concurrency=8, prompt_column="prompt", url_column="url",
+               retry_errors=False, checker=None, profile=None):
+    resumable = not output_path.endswith((".parquet", ".arrow"))
+    done = load_checkpoint(output_path, retry_errors) if resumable else set()
+    if done:
+        print(f"Resuming: {len(done)} rows already scored", file=sys.stderr)
+    checker = checker or CredibilityChecker(priority="bulk", profile=profile)
+
+    scored = reported = 0
+    started = time.time()
+    out = open_output(output_path)
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            pending = set()
+
+            def write_finished(futures):
+                nonlocal scored, reported
+                for future in futures:
+                    out.write(future.result())
+                    scored += 1
+                if resumable:
+                    out.flush()
+                if scored - reported >= 1000:
+                    reported = scored
+                    rate = scored / (time.time() - started)
+                    print(f"{scored} rows scored ({rate:.1f} rows/s)", file=sys.stderr)
+
+            for row, prompt, url in read_rows(input_path, prompt_column, url_column):
+                if row in done:
+                    continue
+                # Keep at most 2x concurrency rows in memory
+                if len(pending) >= concurrency * 2:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    write_finished(finished)
+                pending.add(executor.submit(score_row, checker, row, prompt, url))
+            write_finished(wait(pending).done)
+    finally:
+        out.close()
+
+    print(f"Done: {scored} rows scored this run", file=sys.stderr)
+    if hasattr(checker, "prompt_cache"):
+        print(f"Prompt cache: {checker.prompt_cache.report()}", file=sys.stderr)
+    return scored
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score (prompt, url) rows from a CSV or JSONL file.")
+    parser.add_argument("input", help="CSV (with header) or JSONL file of rows")
+    parser.add_argument("output", help="JSONL file to append results to (also used to resume), or a new .parquet/.arrow file")
+    parser.add_argument("--concurrency", type=int, default=8, help="rows scored at the same time")
+    parser.add_argument("--prompt-column", default="prompt")
+    parser.add_argument("--url-column", default="url")
+    parser.add_argument("--retry-errors", action="store_true", help="re-score rows that failed last time")
+    parser.add_argument("--profile", choices=["default", "fast"], help="model profile (default: MODEL_PROFILE or default)")
+    args = parser.parse_args()
+    bulk_score(args.input, args.output, args.concurrency, args.prompt_column, args.url_column,
+               args.retry_errors, profile=args.profile)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,9 +6,20 @@ from transformers import pipeline
 from sentence_transformers import SentenceTransformer, util
 from serpapi import GoogleSearch
 from datetime import datetime
+import contextvars
 
 import streamlit as st
 
+from upstream import call_upstream, current_fallbacks, current_priority
+from scoring_engine import ScoringEngine, WEIGHTS, combine_domain_trust
+from domain_cache import StaleWhileRevalidateCache
+from domain_index import DomainIndex, normalize_domain
+from semantic_cache import SemanticPromptCache
+from signal_store import SignalStore
+from load_shedder import LoadShedder
+from model_profiles import MODEL_PROFILES, load_calibration, calibrate
+from prefetcher import Prefetcher
+
 import os
 #from dotenv import load_dotenv
 #load_dotenv()
@@ -32,24 +43,86 @@ class CredibilityChecker:
     GOOGLE_FACT_CHECK_URL = "https://factchecktools.googleapis.com/v1alpha1/claims:search"
     GOOGLE_SAFE_BROWSING_URL = "https://safebrowsing.googleapis.com/v4/threatMatches:find"
     WHOIS_URL = "https://www.whoisxmlapi.com/whoisserver/WhoisService"
-    
 
+    # Seconds before an upstream API call is considered failed
+    REQUEST_TIMEOUT = 10
 
-    WEIGHTS = {
-        "domain_trust": 0.275,       # 27.5%
-        "content_relevance": 0.275,  # 27.5%
-        "fact_check": 0.275,         # 27.5%
-        "bias": 0.125,               # 12.5%
-        "citation": 0.05             # 05.0%
-    }
+    # Seconds a cached domain score (age, popularity) is fresh, and how much longer it may still be served stale
+    DOMAIN_CACHE_TTL = 24 * 3600
+    DOMAIN_CACHE_MAX_STALE = 7 * 24 * 3600
 
-    
-    def __init__(self):
-        self.sentiment_analyzer = pipeline("sentiment-analysis", model="cardiffnlp/twitter-roberta-base-sentiment")
-        self.similarity_model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+    # Safe Browsing checks single URLs, so its score is cached per URL, briefly and never stale
+    SAFETY_CACHE_TTL = 3600
+
+    # Seconds a fetched page is reused, and how many pages are kept
+    PAGE_CACHE_TTL = 10 * 60
+    PAGE_CACHE_MAX_ENTRIES = 256
+
+    # Background workers for prefetch(), and how much prefetch work may be queued at once
+    PREFETCH_WORKERS = int(os.environ.get("PREFETCH_WORKERS", 4))
+    PREFETCH_MAX_PENDING = 64
+    # Seconds a check waits for a prefetch of the same key that is already running before fetching itself
+    PREFETCH_WAIT = 2
+
+    # Precomputed scores of well-known domains, built with domain_index.py (optional)
+    DOMAIN_INDEX_PATH = os.environ.get("DOMAIN_INDEX_PATH", "domain_index.bin")
+
+    # Raw sub-scores of every check are saved here when set, for re-weighting (see signal_store.py)
+    SIGNAL_STORE_PATH = os.environ.get("SIGNAL_STORE_PATH")
+
+    # "default" or "fast" models for relevance and bias, see model_profiles.py
+    MODEL_PROFILE = os.environ.get("MODEL_PROFILE", "default")
+    # Run the fast profile even if its calibration file is missing (scores are then not comparable)
+    ALLOW_UNCALIBRATED = os.environ.get("ALLOW_UNCALIBRATED") == "1"
 
+    # Cosine similarity above which a near-duplicate prompt reuses fact-check and citation scores
+    PROMPT_CACHE_THRESHOLD = 0.92
 
-    def get_google_safety_score(self, url):
+
+    # Latency SLO: p95 seconds of a check, and checks in flight, above which low-weight signals are shed
+    LATENCY_SLO = float(os.environ.get("LATENCY_SLO", 4))
+    MAX_CHECKS_IN_FLIGHT = int(os.environ.get("MAX_CHECKS_IN_FLIGHT", 16))
+    # Lowest weight first (5% and 12.5%); skipped in this order under load, see load_shedder.py
+    SHEDDABLE_SIGNALS = ("citation", "bias")
+
+
+    # Declared with the signals in scoring_engine.py
+    WEIGHTS = WEIGHTS
+
+    
+    def __init__(self, priority="interactive", profile=None, allow_uncalibrated=False):
+        # "interactive" calls to paid APIs are served before "bulk" ones (see upstream.py)
+        self.priority = priority
+        self.profile = profile or self.MODEL_PROFILE
+        models = MODEL_PROFILES[self.profile]
+        self.calibration = load_calibration(models["calibration"],
+                                            allow_missing=allow_uncalibrated or self.ALLOW_UNCALIBRATED)
+        # Stored with every check so scores from different models (or an uncalibrated run) are kept apart
+        self.model_version = f"{models['sentiment_model']}+{models['similarity_model']}"
+        if models["calibration"] is not None and self.calibration is None:
+            self.model_version += "+uncalibrated"
+        self.engine = ScoringEngine(self)
+        # (age, popularity) per domain and safety per url; results that used a default score are not cached
+        self.domain_cache = StaleWhileRevalidateCache(
+            self.fetch_domain_scores, ttl=self.DOMAIN_CACHE_TTL, max_stale=self.DOMAIN_CACHE_MAX_STALE,
+            cacheable=lambda value: not value[1])
+        self.safety_cache = StaleWhileRevalidateCache(
+            self.fetch_safety_score, ttl=self.SAFETY_CACHE_TTL, max_stale=0, cacheable=lambda value: not value[1])
+        # Pages expire instead of being served stale
+        self.page_cache = StaleWhileRevalidateCache(
+            self.download_page, ttl=self.PAGE_CACHE_TTL, max_stale=0, max_entries=self.PAGE_CACHE_MAX_ENTRIES)
+        self.prefetcher = Prefetcher(self.PREFETCH_WORKERS, self.PREFETCH_MAX_PENDING)
+        self.domain_index = DomainIndex(self.DOMAIN_INDEX_PATH) if os.path.exists(self.DOMAIN_INDEX_PATH) else None
+        self.sentiment_analyzer = pipeline("sentiment-analysis", model=models["sentiment_model"])
+        self.similarity_model = SentenceTransformer(models["similarity_model"])
+        self.signal_store = SignalStore(self.SIGNAL_STORE_PATH) if self.SIGNAL_STORE_PATH else None
+        self.prompt_cache = SemanticPromptCache(self.similarity_model, threshold=self.PROMPT_CACHE_THRESHOLD)
+        # Bulk runs want complete scores rather than low latency, so they never shed
+        self.load_shedder = LoadShedder(self.SHEDDABLE_SIGNALS if priority == "interactive" else (),
+                                        latency_slo=self.LATENCY_SLO, max_in_flight=self.MAX_CHECKS_IN_FLIGHT)
+
+
+    def get_google_safety_score(self, url, fallbacks=None):
         payload = {
             "client": {"clientId": "your-client-id", "clientVersion": "1.0"},
             "threatInfo": {
@@ -59,103 +132,206 @@ class CredibilityChecker:
                 "threatEntries": [{"url": url}]
             }
         }
-        try:
-            response = requests.post(f"{self.GOOGLE_SAFE_BROWSING_URL}?key={self.GOOGLE_API_KEY}", json=payload)
-            data = response.json()
-            if "matches" in data:
-                return 1  # Unsafe domain → Very low trust score
-            return 100  # Safe domain → High trust score
-        except requests.exceptions.RequestException as e:
-            print(f"Safe Browsing API Error: {e}")
+        def fetch():
+            response = requests.post(f"{self.GOOGLE_SAFE_BROWSING_URL}?key={self.GOOGLE_API_KEY}", json=payload,
+                                     timeout=self.REQUEST_TIMEOUT)
+            response.raise_for_status()
+            return response.json()
+        data = call_upstream("safe_browsing", fetch, self.priority, fallbacks)
+        if data is None:
             return 50  # Neutral trust if request fails
+        if "matches" in data:
+            return 1  # Unsafe domain → Very low trust score
+        return 100  # Safe domain → High trust score
 
 
-    def get_domain_age_score(self, url):
-        try:
-            domain = url.split("//")[-1].split("/")[0]  # Extract domain name
+    def get_domain_age_score(self, url, fallbacks=None):
+        domain = url.split("//")[-1].split("/")[0]  # Extract domain name
+        def fetch():
             whois_url = f"{self.WHOIS_URL}?apiKey={self.WHOIS_API_KEY}&domainName={domain}&outputFormat=json"
-            response = requests.get(whois_url)
-            data = response.json()
-            if "WhoisRecord" in data and "createdDate" in data["WhoisRecord"]:
-                created_date = data["WhoisRecord"]["createdDate"]  # e.g., "1997-03-03T05:00:00Z"
-                domain_year = int(created_date.split("-")[0])  # Extract the year
-                current_year = datetime.now().year
-                domain_age = current_year - domain_year
-                # Scale domain age score (0 to 100)
-                return min(domain_age * 10, 100)  # 10 years or more = max score
-            return 50  # Default mid-trust if no data found
-        except requests.exceptions.RequestException as e:
-            print(f"API Error: {e}")
+            response = requests.get(whois_url, timeout=self.REQUEST_TIMEOUT)
+            response.raise_for_status()
+            return response.json()
+        data = call_upstream("whois", fetch, self.priority, fallbacks)
+        if data is None:
             return 50  # Return default mid-trust if request fails
+        if "WhoisRecord" in data and "createdDate" in data["WhoisRecord"]:
+            created_date = data["WhoisRecord"]["createdDate"]  # e.g., "1997-03-03T05:00:00Z"
+            domain_year = int(created_date.split("-")[0])  # Extract the year
+            current_year = datetime.now().year
+            domain_age = current_year - domain_year
+            # Scale domain age score (0 to 100)
+            return min(domain_age * 10, 100)  # 10 years or more = max score
+        return 50  # Default mid-trust if no data found
+
+
+    def get_google_search_popularity(self, url, fallbacks=None):
+        domain = url.split("//")[-1].split("/")[0]  # Extract domain name
+        # Call SerpAPI to get Google search results
+        params = {
+            "q": f"site:{domain}",
+            "engine": "google",
+            "api_key": self.SERP_API_KEY
+        }
+        results = call_upstream("serpapi", lambda: GoogleSearch(params).get_dict(), self.priority, fallbacks)
+        if results is None:
+            return 50  # Default mid-trust if API request fails
+        # Extract search result count
+        organic_results = results.get("organic_results", [])
+        popularity_score = min(len(organic_results) * 10, 100)
+        return popularity_score
 
 
-    def get_google_search_popularity(self, url):
-        try:
-            domain = url.split("//")[-1].split("/")[0]  # Extract domain name
-            # Call SerpAPI to get Google search results
-            params = {
-                "q": f"site:{domain}",
-                "engine": "google",
-                "api_key": self.SERP_API_KEY
-            }
-            search = GoogleSearch(params)
-            results = search.get_dict()
-            # Extract search result count
-            organic_results = results.get("organic_results", [])
-            popularity_score = min(len(organic_results) * 10, 100)
-            return popularity_score
-        except Exception as e:
-            print(f"Error: {e}")
-            return 50  # Default mid-trust if API request fails
+    def fetch_domain_scores(self, url):
+        # Scores that belong to the whole domain
+        fallbacks = []
+        domain_age_score = self.get_domain_age_score(url, fallbacks)
+        popularity_score = self.get_google_search_popularity(url, fallbacks)
+        return (domain_age_score, popularity_score), fallbacks
+
+
+    def fetch_safety_score(self, url):
+        fallbacks = []
+        return self.get_google_safety_score(url, fallbacks), fallbacks
+
+
+    def cached_scores(self, cache, prefetch_key, cache_key, url, fallbacks=None):
+        # A prefetch of the same key that is already running is waited for instead of calling the APIs again
+        prefetched = self.prefetcher.wait(prefetch_key, self.PREFETCH_WAIT)
+        # A prefetch that fell back to a default (e.g. found no free token in its lane) is not cached,
+        # so this fetches again at the checker's own priority
+        if prefetched is None or prefetched[1]:
+            prefetched = cache.get(cache_key, url)
+        scores, cache_fallbacks = prefetched
+        if fallbacks is None:
+            fallbacks = current_fallbacks.get()
+        if fallbacks is not None:
+            fallbacks.extend(cache_fallbacks)
+        return scores
+
+
+    def get_url_safety_score(self, url, fallbacks=None):
+        return self.cached_scores(self.safety_cache, ("safety", url), url, url, fallbacks)
+
+
+    def get_domain_signals(self, url, fallbacks=None):
+        # (age, popularity) of the url's domain
+        domain = normalize_domain(url.split("//")[-1].split("/")[0])  # Extract domain name, as keyed in the index
+        # Well-known domains come from the precomputed index without WHOIS or SerpAPI calls
+        if self.domain_index is not None:
+            scores = self.domain_index.lookup(domain)
+            if scores is not None:
+                return scores
+        # Otherwise served from the domain cache, so an expired entry never blocks (see domain_cache.py)
+        return self.cached_scores(self.domain_cache, ("domain", domain), domain, url, fallbacks)
+
+
+    def get_domain_scores(self, url, fallbacks=None):
+        # (safety, age, popularity): safety of the url itself, age and popularity of its domain
+        return (self.get_url_safety_score(url, fallbacks), *self.get_domain_signals(url, fallbacks))
 
 
-    def get_domain_trust_score(self, url):
-        safety_score = self.get_google_safety_score(url)
-        domain_age_score = self.get_domain_age_score(url)
-        popularity_score = self.get_google_search_popularity(url)
-        final_trust_score = (safety_score * 0.4) + (domain_age_score * 0.3) + (popularity_score * 0.3)
-        return round(final_trust_score, 2)
+    def get_domain_trust_score(self, url, fallbacks=None):
+        return self.combine_domain_trust(*self.get_domain_scores(url, fallbacks))
 
 
-    def get_content_relevance_score(self, url, query):
-        page = requests.get(url)
+    def combine_domain_trust(self, safety_score, domain_age_score, popularity_score):
+        # 40% / 30% / 30%, see DOMAIN_TRUST_WEIGHTS in scoring_engine.py
+        return combine_domain_trust(safety_score, domain_age_score, popularity_score)
+
+
+    def fetch_page(self, url):
+        # From the page cache, or from a prefetch of the page that is already running
+        page = self.prefetcher.wait(("page", url), self.PREFETCH_WAIT)
+        return page if page is not None else self.page_cache.get(url, url)
+
+
+    def download_page(self, url):
+        return requests.get(url, timeout=5, headers={"User-Agent": "Mozilla/5.0"})
+
+
+    def prefetch(self, urls):
+        """
+        Start fetching the domain scores and pages of urls in the background and return at once,
+        so later checks of these urls find them cached. Cached and in-flight work is skipped.
+        API calls go through the "prefetch" lane, which only uses rate limit tokens nobody is waiting for.
+        """
+        def in_prefetch_lane(fn, *args):
+            context = contextvars.copy_context()
+            context.run(current_priority.set, "prefetch")
+            return context.run(fn, *args)
+
+        for url in urls:
+            domain = normalize_domain(url.split("//")[-1].split("/")[0])  # Extract domain name, as keyed in the index
+            if (self.domain_index is None or self.domain_index.lookup(domain) is None) \
+                    and self.domain_cache.peek(domain) is None:
+                self.prefetcher.submit(("domain", domain), in_prefetch_lane, self.domain_cache.get, domain, url)
+            if self.safety_cache.peek(url) is None:
+                self.prefetcher.submit(("safety", url), in_prefetch_lane, self.safety_cache.get, url, url)
+            if self.page_cache.peek(url) is None:
+                self.prefetcher.submit(("page", url), self.page_cache.get, url, url)
+
+
+    def get_content_relevance_score(self, url, query, page=None):
+        if page is None:
+            page = self.fetch_page(url)
         soup = BeautifulSoup(page.text, "html.parser")
         text = " ".join([p.get_text() for p in soup.find_all("p")])[:2000]
         embeddings1 = self.similarity_model.encode(query, convert_to_tensor=True)
         embeddings2 = self.similarity_model.encode(text, convert_to_tensor=True)
         similarity_score = util.pytorch_cos_sim(embeddings1, embeddings2).item()
-        return round(similarity_score*100, 2)
+        return calibrate(self.calibration, "content_relevance", round(similarity_score*100, 2))
 
 
-    def get_fact_check_score(self, query):
+    def cached_prompt_score(self, query, key, lookup, fallbacks=None):
+        # Prompt-only scores are reused for near-duplicate prompts (see semantic_cache.py)
+        if fallbacks is None:
+            fallbacks = current_fallbacks.get()
+        def compute():
+            skipped = []
+            score = lookup(query, skipped)
+            if fallbacks is not None:
+                fallbacks.extend(skipped)
+            return score, not skipped
+        return self.prompt_cache.get_or_compute(query, key, compute)
+
+
+    def get_fact_check_score(self, query, fallbacks=None):
+        return self.cached_prompt_score(query, "fact_check", self.lookup_fact_check_score, fallbacks)
+
+
+    def lookup_fact_check_score(self, query, fallbacks=None):
         params = {"query": query, "key": self.GOOGLE_API_KEY}
-        response = requests.get(self.GOOGLE_FACT_CHECK_URL, params=params)
-        if response.status_code == 200:
-            data = response.json()
-            if "claims" not in data or len(data["claims"]) == 0:
-                return 25  # No fact-check available
-            fact_check_scores = []  # Store fact-check results
-            for claim in data["claims"]:
-                reviews = claim.get("claimReview", [])
-                for review in reviews:
-                    rating = review.get("textualRating", "").lower()
-                    # Assign binary fact-check scores
-                    if "true" in rating:
-                        fact_check_scores.append(100)
-                    elif "false" in rating:
-                        fact_check_scores.append(0)
-            # If multiple fact-checks exist, return the most confident result
-            return max(fact_check_scores) if fact_check_scores else 25
-        print(f"API Error {response.status_code}: {response.text}")  # Debugging API errors
-        return 25  # Default to no fact-check found
-
-
-    def get_bias_score(self, url):
+        def fetch():
+            response = requests.get(self.GOOGLE_FACT_CHECK_URL, params=params, timeout=self.REQUEST_TIMEOUT)
+            if response.status_code != 200:
+                raise requests.exceptions.HTTPError(f"API Error {response.status_code}: {response.text}")
+            return response.json()
+        data = call_upstream("fact_check", fetch, self.priority, fallbacks)
+        if data is None:
+            return 25  # Default to no fact-check found
+        if "claims" not in data or len(data["claims"]) == 0:
+            return 25  # No fact-check available
+        fact_check_scores = []  # Store fact-check results
+        for claim in data["claims"]:
+            reviews = claim.get("claimReview", [])
+            for review in reviews:
+                rating = review.get("textualRating", "").lower()
+                # Assign binary fact-check scores
+                if "true" in rating:
+                    fact_check_scores.append(100)
+                elif "false" in rating:
+                    fact_check_scores.append(0)
+        # If multiple fact-checks exist, return the most confident result
+        return max(fact_check_scores) if fact_check_scores else 25
+
+
+    def get_bias_score(self, url, page=None):
         try:
             if not url.strip():
                 return "Error: URL is empty"
             # Fetch page content
-            response = requests.get(url, timeout=5, headers={"User-Agent": "Mozilla/5.0"})
+            response = page if page is not None else self.fetch_page(url)
             if response.status_code != 200:
                 return f"Error: Unable to access URL (HTTP {response.status_code})"
             soup = BeautifulSoup(response.text, "html.parser")
@@ -177,19 +353,24 @@ class CredibilityChecker:
                 bias_score = 40 - (score * 40)  # Bias starts at 40%, scales down to 0%
             else:  # Neutral
                 bias_score = 50  # Set a mid-point for neutrality
-            return round(score*100, 2)  # Reward neutral/positive content
+            return calibrate(self.calibration, "bias", round(score*100, 2))  # Reward neutral/positive content
         except requests.exceptions.RequestException as e:
             return f"Error: {str(e)}"
 
 
-    def get_citation_score(self, query):
+    def get_citation_score(self, query, fallbacks=None):
+        return self.cached_prompt_score(query, "citation", self.lookup_citation_score, fallbacks)
+
+
+    def lookup_citation_score(self, query, fallbacks=None):
         params = {
             "q": query,
             "engine": "google_scholar",
             "api_key": self.SERP_API_KEY
         }
-        search = GoogleSearch(params)
-        results = search.get_dict()  # ✅ Correct method
+        results = call_upstream("serpapi", lambda: GoogleSearch(params).get_dict(), self.priority, fallbacks)  # ✅ Correct method
+        if results is None:
+            return 0  # Default to no citations found
         # Check if scholarly references exist
         if "organic_results" in results:
             num_results = len(results["organic_results"])
@@ -198,29 +379,87 @@ class CredibilityChecker:
 
     # Compile scores
 
-    def validate_url(self, prompt, url):
-        domain_trust_score = self.get_domain_trust_score(url)
-        weighted_domain_trust_score = round(domain_trust_score * self.WEIGHTS['domain_trust'], 2)
-
-        content_relevance_score = self.get_content_relevance_score(url, prompt)
-        weighted_content_relevance_score = round(content_relevance_score * self.WEIGHTS['content_relevance'], 2)
-
-        fact_check_score = self.get_fact_check_score(prompt)
-        weighted_fact_check_score = round(fact_check_score * self.WEIGHTS['fact_check'], 2)
-
-        bias_score = self.get_bias_score(url)
-        weighted_bias_score = round(bias_score * self.WEIGHTS['bias'], 2)
+    def run_engine(self, prompt, url, fallbacks, values=None, signals=None):
+        # Upstream APIs that were skipped in favor of their default score are added to fallbacks
+        context = contextvars.copy_context()
+        context.run(current_fallbacks.set, fallbacks)
+        return self.engine.iter_run(prompt, url, signals, context=context, values=values)
+
+
+    def scoring_plan(self, prompt):
+        """
+        Signals to run given the current load, and the scores of shed signals that can still be
+        served from the prompt cache. Shed signals in neither are left out of the result (degraded).
+        """
+        shed = self.load_shedder.shed_signals()
+        cached = {}
+        for signal in shed:
+            score = self.prompt_cache.peek(prompt, signal)
+            if score is not None:
+                cached[signal] = score
+        return [signal for signal in self.engine.signals if signal not in shed], cached
+
+
+    def store_signals(self, prompt, url, raw, domain_scores, fallbacks):
+        # Checks degraded under load or that used default scores for unavailable services are not stored,
+        # so a partial or default-based row never replaces a measured one on rescore
+        if self.signal_store is None or fallbacks or any(signal not in raw for signal in self.engine.signals):
+            return
+        safety_score, domain_age_score, popularity_score = domain_scores
+        self.signal_store.append(prompt, url, self.model_version, {
+            "safety": safety_score,
+            "domain_age": domain_age_score,
+            "popularity": popularity_score,
+            **raw
+        })
 
-        citation_score = self.get_citation_score(prompt)
-        weighted_citation_score = round(citation_score * self.WEIGHTS['citation'], 2)
 
-        final_score = round(
-            weighted_domain_trust_score +
-            weighted_content_relevance_score +
-            weighted_fact_check_score +
-            weighted_bias_score +
-            weighted_citation_score
-        , 2)
+    def validate_url(self, prompt, url):
+        fallbacks = []
+        values = {}
+        signals, raw = self.scoring_plan(prompt)
+        with self.load_shedder.track():
+            raw.update(self.run_engine(prompt, url, fallbacks, values, signals))
+        self.store_signals(prompt, url, raw, values["domain_scores"], fallbacks)
+        return self.compile_scores(url, raw["domain_trust"], raw["content_relevance"],
+                                   raw["fact_check"], raw.get("bias"), raw.get("citation"), fallbacks)
+
+
+    def iter_validate_url(self, prompt, url, fallbacks=None):
+        """
+        Streaming version of validate_url.
+
+        Yield (signal, score, weighted_score) as soon as each signal finishes, fastest first.
+        Signals shed under load are not yielded. Pass the collected scores (None for the
+        missing ones) and fallbacks to compile_scores for the final result.
+        The raw scores are stored once every signal has been yielded, unless some were shed
+        or fell back to a default.
+        """
+        if fallbacks is None:
+            fallbacks = []
+        signals, raw = self.scoring_plan(prompt)
+        weights = self.engine.signal_weights(signals + list(raw))
+        values = {}
+        with self.load_shedder.track():
+            for signal, score in raw.items():
+                yield signal, score, self.engine.weighted_score(signal, score, weights)
+            for signal, score in self.run_engine(prompt, url, fallbacks, values, signals):
+                raw[signal] = score
+                yield signal, score, self.engine.weighted_score(signal, score, weights)
+        self.store_signals(prompt, url, raw, values["domain_scores"], fallbacks)
+
+
+    def compile_scores(self, url, domain_trust_score, content_relevance_score,
+                       fact_check_score, bias_score, citation_score, fallbacks=()):
+        # A score of None means the signal was shed under load
+        scores = {
+            "domain_trust": domain_trust_score,
+            "content_relevance": content_relevance_score,
+            "fact_check": fact_check_score,
+            "bias": bias_score,
+            "citation": citation_score
+        }
+        result = self.engine.compile_scores(url, {signal: score for signal, score in scores.items() if score is not None})
 
         explanations = []
         if domain_trust_score < 50:
@@ -229,26 +468,15 @@ class CredibilityChecker:
             explanations.append("Content is not relevant to your query.")
         elif fact_check_score < 50:
             explanations.append("Limited fact-checking reference found.")
-        elif bias_score < 50:
+        elif bias_score is not None and bias_score < 50:
             explanations.append("Potential bias detected.")
-        elif citation_score < 50:
+        elif citation_score is not None and citation_score < 50:
             explanations.append("Very few citations found for this content.")
         
-        return {
-            "url": url,
-            "domain_trust": domain_trust_score,
-            "w_domain_trust": weighted_domain_trust_score,
-            "relevance_score": content_relevance_score,
-            "w_relevance_score": weighted_content_relevance_score,
-            "fact_check": fact_check_score,
-            "w_fact_check": weighted_fact_check_score,
-            "bias_score": bias_score,
-            "w_bias_score": weighted_bias_score,
-            "citation_score": citation_score,
-            "w_citation_score": weighted_citation_score,
-            "final_score": final_score,
-            "explanations": " ".join(explanations) if explanations else "This source is credible and relevant!"
-        }
+        result["explanations"] = " ".join(explanations) if explanations else "This source is credible and relevant!"
+        result["fallbacks"] = sorted(set(fallbacks))
+        result["degraded"] = [signal for signal, score in scores.items() if score is None]
+        return result
 
 
     def get_star_ratings(self, score):
@@ -266,12 +494,125 @@ class CredibilityChecker:
 
     def credibility_score(self, prompt, url):
         scores = self.validate_url(prompt, url)
+        return self.summarize_scores(scores)
+
+    def summarize_scores(self, scores):
         credibility_score = round(scores['final_score'], 2)
         ratings = self.get_star_ratings(credibility_score)
         explanations = scores['explanations']
-        result = {'score': credibility_score, 'ratings': ratings, 'explanation': explanations}
+        result = {'score': credibility_score, 'ratings': ratings, 'explanation': explanations,
+                  'fallbacks': scores['fallbacks'], 'degraded': scores['degraded']}
         return result
 
+    # Top-k ranking
+
+    # Lowest and highest possible raw score of each signal, used to bound signals
+    # that have not been computed yet. Relevance is a cosine similarity, so it can be negative.
+    SCORE_RANGES = {
+        "domain_trust": (0, 100),
+        "content_relevance": (-100, 100),
+        "fact_check": (0, 100),
+        "bias": (0, 100),
+        "citation": (0, 100)
+    }
+
+    def score_bounds(self, ranges):
+        # Same rounding and summing order as compile_scores, so the bounds collapse
+        # to the exact final score once every signal is known.
+        low = high = 0
+        for signal, weight in self.WEIGHTS.items():
+            low += round(ranges[signal][0] * weight, 2)
+            high += round(ranges[signal][1] * weight, 2)
+        return round(low, 2), round(high, 2)
+
+
+    def rank_urls(self, prompt, urls, k=5):
+        """
+        Return the validate_url results of the k most credible urls, best first.
+
+        Cheap signals are computed for every candidate first. The expensive ones
+        (WHOIS age, SerpAPI popularity, RoBERTa bias) are skipped for candidates whose
+        best possible score can no longer beat the k-th best guaranteed score,
+        so the ranking is identical to scoring every url in full.
+        """
+        urls = list(urls)
+        if k <= 0 or not urls:
+            return []
+
+        # Prompt-only signals are shared by every candidate
+        prompt_fallbacks = []
+        fact_check_score = self.get_fact_check_score(prompt, prompt_fallbacks)
+        citation_score = self.get_citation_score(prompt, prompt_fallbacks)
+
+        candidates = []
+        for url in urls:
+            ranges = dict(self.SCORE_RANGES)
+            ranges["fact_check"] = (fact_check_score, fact_check_score)
+            ranges["citation"] = (citation_score, citation_score)
+            candidates.append({"url": url, "ranges": ranges, "scores": {}, "fallbacks": list(prompt_fallbacks)})
+
+        def threshold():
+            # k-th best lower bound; any candidate whose upper bound is below it cannot make the top k
+            if len(candidates) <= k:
+                return None
+            lows = sorted((self.score_bounds(c["ranges"])[0] for c in candidates), reverse=True)
+            return lows[k - 1]
+
+        def pruned(candidate):
+            cutoff = threshold()
+            return cutoff is not None and self.score_bounds(candidate["ranges"])[1] < cutoff
+
+        # Stage 1: cheap signals (the url's Safe Browsing score plus cached domain scores, and the MiniLM relevance score)
+        for c in candidates:
+            url, ranges, scores = c["url"], c["ranges"], c["scores"]
+            domain = normalize_domain(url.split("//")[-1].split("/")[0])
+            scores["safety"] = self.get_url_safety_score(url, c["fallbacks"])
+            if self.domain_cache.peek(domain) is not None or (
+                    self.domain_index is not None and self.domain_index.lookup(domain) is not None):
+                c["domain_scores"] = (scores["safety"], *self.get_domain_signals(url, c["fallbacks"]))
+                scores["domain_trust"] = self.combine_domain_trust(*c["domain_scores"])
+                ranges["domain_trust"] = (scores["domain_trust"], scores["domain_trust"])
+            else:
+                ranges["domain_trust"] = (self.combine_domain_trust(scores["safety"], 0, 0),
+                                          self.combine_domain_trust(scores["safety"], 100, 100))
+            scores["content_relevance"] = self.get_content_relevance_score(url, prompt)
+            ranges["content_relevance"] = (scores["content_relevance"], scores["content_relevance"])
+
+        # Stage 2: WHOIS age and SerpAPI popularity, most promising candidates first
+        # Stage 3: RoBERTa bias
+        by_upper_bound = sorted(candidates, key=lambda c: self.score_bounds(c["ranges"])[1], reverse=True)
+        for stage in ("domain_trust", "bias"):
+            for c in by_upper_bound:
+                if stage in c["scores"] or pruned(c):
+                    continue
+                url, ranges, scores = c["url"], c["ranges"], c["scores"]
+                if stage == "domain_trust":
+                    c["domain_scores"] = (scores["safety"], *self.get_domain_signals(url, c["fallbacks"]))
+                    scores["domain_trust"] = self.combine_domain_trust(*c["domain_scores"])
+                else:
+                    scores["bias"] = self.get_bias_score(url)
+                ranges[stage] = (scores[stage], scores[stage])
+
+        # Survivors are fully scored and stored like any other check;
+        # the stable sort keeps input order for ties, like exhaustive scoring
+        for c in candidates:
+            if "bias" in c["scores"]:
+                self.store_signals(prompt, c["url"], {
+                    "domain_trust": c["scores"]["domain_trust"],
+                    "content_relevance": c["scores"]["content_relevance"],
+                    "fact_check": fact_check_score,
+                    "bias": c["scores"]["bias"],
+                    "citation": citation_score
+                }, c["domain_scores"], c["fallbacks"])
+        results = [
+            self.compile_scores(c["url"], c["scores"]["domain_trust"], c["scores"]["content_relevance"],
+                                fact_check_score, c["scores"]["bias"], citation_score, c["fallbacks"])
+            for c in candidates if "bias" in c["scores"]
+        ]
+        results.sort(key=lambda r: r["final_score"], reverse=True)
+        return results[:k]
+
+
 
 # Example
 '''
@@ -0,0 +1,92 @@
+# Stale-while-revalidate cache for domain trust signals.
+#
+# Domain scores change slowly, so an expired entry is still served right away while
+# a background thread fetches a fresh one. Entries that are read often ("hot") are
+# refreshed shortly before they expire, so popular domains practically never block.
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class StaleWhileRevalidateCache:
+    """
+    loader(*args) computes the value of a key. get(key, *args) returns:
+    - a fresh entry as is; a hot one (hot_hits reads since its last refresh) that is past
+      refresh_ahead of its ttl also queues a background refresh
+    - an expired entry immediately, and queues a background refresh
+    - otherwise (missing, or older than max_stale) the loader's result, computed in the caller
+    Values for which cacheable(value) is False are returned but not stored.
+    """
+
+    def __init__(self, loader, ttl=24 * 3600, max_stale=7 * 24 * 3600, refresh_ahead=0.8, hot_hits=3,
+                 max_entries=100000, refresh_workers=2, cacheable=lambda value: True):
+        self.loader = loader
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.refresh_ahead = refresh_ahead
+        self.hot_hits = hot_hits
+        self.max_entries = max_entries
+        self.cacheable = cacheable
+        self.entries = OrderedDict()  # key -> [value, fetched_at, hits since fetched]
+        self.refreshing = set()
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="swr-refresh")
+        self.stats = {"fresh": 0, "stale": 0, "miss": 0, "refreshes": 0}
+
+    def peek(self, key):
+        # Value get() would serve from the cache (fresh or stale), without counting a read or refreshing;
+        # None if absent or older than max_stale, i.e. if get() would call the loader
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or time.time() - entry[1] >= self.ttl + self.max_stale:
+                return None
+            return entry[0]
+
+    def get(self, key, *args):
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and now - entry[1] < self.ttl + self.max_stale:
+                self.entries.move_to_end(key)
+                entry[2] += 1
+                age = now - entry[1]
+                if age >= self.ttl:
+                    self.stats["stale"] += 1
+                    self._refresh_in_background(key, args)
+                else:
+                    self.stats["fresh"] += 1
+                    if age >= self.ttl * self.refresh_ahead and entry[2] >= self.hot_hits:
+                        self._refresh_in_background(key, args)
+                return entry[0]
+            self.stats["miss"] += 1
+        value = self.loader(*args)
+        self.put(key, value)
+        return value
+
+    def put(self, key, value):
+        if not self.cacheable(value):
+            return
+        with self.lock:
+            self.entries[key] = [value, time.time(), 0]
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def _refresh_in_background(self, key, args):
+        # Called with the lock held; at most one refresh per key at a time
+        if key in self.refreshing:
+            return
+        self.refreshing.add(key)
+        self.stats["refreshes"] += 1
+        self.executor.submit(self._refresh, key, args)
+
+    def _refresh(self, key, args):
+        try:
+            self.put(key, self.loader(*args))
+        except Exception as e:
+            print(f"Background refresh of {key} failed: {e}")
+        finally:
+            with self.lock:
+                self.refreshing.discard(key)
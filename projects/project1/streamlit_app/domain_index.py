@@ -0,0 +1,131 @@
+# Precomputed domain reputation index.
+#
+# An offline build step scores a list of well-known domains (age, popularity) and writes
+# them to a compact binary file sorted by a 64-bit hash of the domain.
+# The checker memory-maps the file and binary searches it before calling WHOIS or SerpAPI,
+# so loading is instant and a lookup touches ~log2(n) records even with millions of entries.
+#
+# File layout:
+#   header: magic (8 bytes), record count (uint64), build time (uint64 unix seconds)
+#   records: domain hash (8 bytes big-endian), age, popularity (uint8 each)
+#
+# Safety is not indexed: Safe Browsing judges single URLs, not whole domains.
+#
+# Build using terminal:
+# python domain_index.py domains.txt domain_index.bin --concurrency 8
+
+import argparse
+import hashlib
+import mmap
+import struct
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+MAGIC = b"DOMIDX02"
+HEADER = struct.Struct(">8sQQ")
+RECORD = struct.Struct(">8sBB")
+
+
+def normalize_domain(host):
+    # Same key for "www.Example.com.:443" and "example.com", at build and at lookup time
+    domain = host.strip().lower().split("@")[-1].split(":")[0].rstrip(".")
+    return domain[4:] if domain.startswith("www.") else domain
+
+
+def domain_key(domain):
+    return hashlib.blake2b(normalize_domain(domain).encode("utf-8"), digest_size=8).digest()
+
+
+class DomainIndex:
+    """
+    Read-only view of an index file. lookup(domain) returns (age, popularity)
+    or None if the domain is not in the index.
+    """
+
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, self.built_at = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or len(self.data) != HEADER.size + self.count * RECORD.size:
+            raise ValueError(f"{path} is not a valid domain index (rebuild it with domain_index.py)")
+
+    def __len__(self):
+        return self.count
+
+    def lookup(self, domain):
+        key = domain_key(domain)
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            offset = HEADER.size + middle * RECORD.size
+            middle_key = self.data[offset:offset + 8]
+            if middle_key < key:
+                low = middle + 1
+            elif middle_key > key:
+                high = middle
+            else:
+                return RECORD.unpack_from(self.data, offset)[1:]
+        return None
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+
+def write_index(path, entries):
+    """
+    Write (domain, age, popularity) entries to an index file.
+    Later entries win if a domain appears twice. Scores are clamped to 0-100
+    (a WHOIS creation year in the future gives a negative age score).
+    """
+    records = {}
+    for domain, age, popularity in entries:
+        key = domain_key(domain)
+        records[key] = RECORD.pack(key, min(max(int(age), 0), 100), min(max(int(popularity), 0), 100))
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(records), int(time.time())))
+        for key in sorted(records):
+            f.write(records[key])
+    return len(records)
+
+
+def build_index(domains_path, index_path, concurrency=8, checker=None):
+    """
+    Score every domain (one per line) with the live APIs and write the index.
+    Domains where any API fell back to its default score are left out, so they
+    are looked up live instead of being pinned to a default.
+    """
+    if checker is None:
+        from credibility_checker import CredibilityChecker
+        checker = CredibilityChecker(priority="bulk")
+
+    def score(domain):
+        scores, fallbacks = checker.fetch_domain_scores(f"https://{domain}")
+        return None if fallbacks else (domain, *scores)
+
+    with open(domains_path, encoding="utf-8") as f:
+        domains = list(dict.fromkeys(normalize_domain(line) for line in f if line.strip()))
+    entries = []
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        # Submit in chunks so millions of domains do not all sit in the queue at once
+        for start in range(0, len(domains), 10000):
+            chunk = domains[start:start + 10000]
+            entries += [entry for entry in executor.map(score, chunk) if entry is not None]
+            print(f"{start + len(chunk)} of {len(domains)} domains scored", file=sys.stderr)
+    count = write_index(index_path, entries)
+    print(f"Indexed {count} of {len(domains)} domains into {index_path}", file=sys.stderr)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the precomputed domain reputation index.")
+    parser.add_argument("domains", help="text file with one domain per line")
+    parser.add_argument("index", help="index file to write")
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+    build_index(args.domains, args.index, args.concurrency)
+
+
+if __name__ == "__main__":
+    main()
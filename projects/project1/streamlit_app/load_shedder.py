@@ -0,0 +1,84 @@
+# Adaptive load shedding of the low-weight signals.
+#
+# Every check is timed and counted while it runs. When the p95 latency of recent checks
+# goes over the SLO, or too many checks are in flight, the shedder raises its level and
+# the checker skips the next lowest-weight signal (citation first, then bias), scoring
+# the rest with renormalized weights and marking the result as degraded.
+# Once latency and queue depth are well below the limits the level is lowered again,
+# one step at a time, until full scoring resumes.
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class LoadShedder:
+    """
+    signals: signal names that may be skipped, in the order they are shed.
+    track() wraps one check; shed_signals() returns the signals to skip right now.
+    """
+
+    def __init__(self, signals, latency_slo, max_in_flight, window=200, min_samples=20, hold=10):
+        self.signals = tuple(signals)
+        self.latency_slo = latency_slo
+        self.max_in_flight = max_in_flight
+        self.min_samples = min_samples
+        self.hold = hold  # minimum seconds between two level changes, so the level does not flap
+        self.latencies = deque(maxlen=window)
+        self.in_flight = 0
+        self.level = 0  # number of signals currently shed
+        self.changed_at = 0
+        self.lock = threading.Lock()
+
+    def p95(self):
+        # Called with the lock held; None until there are enough samples at the current level
+        if len(self.latencies) < self.min_samples:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[int(len(ordered) * 0.95) - 1]
+
+    def update(self):
+        # Called with the lock held
+        now = time.monotonic()
+        if now - self.changed_at < self.hold:
+            return
+        p95 = self.p95()
+        overloaded = self.in_flight > self.max_in_flight or (p95 is not None and p95 > self.latency_slo)
+        relaxed = self.in_flight <= self.max_in_flight // 2 and p95 is not None and p95 < self.latency_slo * 0.7
+        if overloaded and self.level < len(self.signals):
+            self.level += 1
+        elif relaxed and self.level > 0:
+            self.level -= 1
+        else:
+            return
+        self.changed_at = now
+        # Latencies measured at the old level say nothing about the new one
+        self.latencies.clear()
+
+    @contextmanager
+    def track(self):
+        with self.lock:
+            self.in_flight += 1
+            self.update()
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+                self.latencies.append(time.monotonic() - started)
+                self.update()
+
+    def shed_signals(self):
+        with self.lock:
+            return self.signals[:self.level]
+
+    def stats(self):
+        with self.lock:
+            p95 = self.p95()
+            return {
+                "shed": list(self.signals[:self.level]),
+                "in_flight": self.in_flight,
+                "p95": round(p95, 2) if p95 is not None else None
+            }
@@ -0,0 +1,184 @@
+# Model profiles for the two model-based signals (content relevance and bias).
+#
+# "default": RoBERTa sentiment + MiniLM-L6 embeddings, as before.
+# "fast":    distilled DistilBERT sentiment (6 layers, SST-2) + MiniLM-L3 embeddings (3 layers),
+#            meant for high-volume bulk scoring.
+#
+# The fast models do not produce the same score distribution (e.g. DistilBERT is more
+# confident than RoBERTa), so their raw scores go through a calibration: a quantile map
+# fitted on a sample of pages that sends each fast score to the default score at the same
+# quantile. Bias and relevance then keep the range the weights were chosen for.
+#
+# Fit the calibration and compare accuracy vs. throughput against the default profile
+# (rows file as for bulk_score.py; pages are fetched once and scored by both profiles):
+# python model_profiles.py rows.csv --limit 500
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+# Calibration of the fast profile, written by this script next to it
+CALIBRATION_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fast_calibration.json")
+
+MODEL_PROFILES = {
+    "default": {
+        "sentiment_model": "cardiffnlp/twitter-roberta-base-sentiment",
+        "similarity_model": "sentence-transformers/all-MiniLM-L6-v2",
+        "calibration": None
+    },
+    "fast": {
+        "sentiment_model": "distilbert-base-uncased-finetuned-sst-2-english",
+        "similarity_model": "sentence-transformers/paraphrase-MiniLM-L3-v2",
+        "calibration": CALIBRATION_PATH
+    }
+}
+
+# Model-based signals that are calibrated, with their weight (for the effect on the final score)
+CALIBRATED_SIGNALS = {"content_relevance": 0.275, "bias": 0.125}
+
+# Quantiles at which the calibration map is fitted
+QUANTILES = np.linspace(0, 100, 41)
+
+
+def load_calibration(path, allow_missing=False):
+    """
+    {signal: (fast knots, default knots)}, or None for a profile without calibration.
+    A missing calibration file is an error unless allow_missing: uncalibrated fast scores
+    are on a different scale than the weights were chosen for.
+    """
+    if path is None:
+        return None
+    if not os.path.exists(path):
+        if not allow_missing:
+            raise FileNotFoundError(f"{path} not found: fit it with model_profiles.py, "
+                                    "or set ALLOW_UNCALIBRATED=1 to use uncalibrated fast model scores")
+        print(f"{path} not found, fast model scores are not calibrated", file=sys.stderr)
+        return None
+    with open(path) as f:
+        return {signal: (np.array(knots["fast"]), np.array(knots["default"]))
+                for signal, knots in json.load(f)["signals"].items()}
+
+
+def calibrate(calibration, signal, score):
+    if calibration is None or signal not in calibration:
+        return score
+    fast_knots, default_knots = calibration[signal]
+    return round(float(np.interp(score, fast_knots, default_knots)), 2)
+
+
+def fit_calibration(fast_scores, default_scores):
+    fast_knots = np.percentile(fast_scores, QUANTILES)
+    default_knots = np.percentile(default_scores, QUANTILES)
+    # np.interp needs increasing knots; drop repeated fast quantiles
+    keep = np.concatenate(([True], np.diff(fast_knots) > 0))
+    return fast_knots[keep], default_knots[keep]
+
+
+def rank_correlation(a, b):
+    # Spearman correlation (ties broken by position)
+    ranks_a = np.argsort(np.argsort(a))
+    ranks_b = np.argsort(np.argsort(b))
+    return float(np.corrcoef(ranks_a, ranks_b)[0, 1])
+
+
+def score_pages(checker, rows):
+    """
+    Relevance and bias of every (prompt, url, page) row with one checker's models,
+    plus the seconds spent in each model on each row. Rows whose bias is an error message are left out.
+    """
+    scores = {signal: [] for signal in CALIBRATED_SIGNALS}
+    seconds = {signal: [] for signal in CALIBRATED_SIGNALS}
+    kept = []
+    for i, (prompt, url, page) in enumerate(rows):
+        started = time.perf_counter()
+        relevance = checker.get_content_relevance_score(url, prompt, page)
+        scored = time.perf_counter()
+        bias = checker.get_bias_score(url, page)
+        done = time.perf_counter()
+        if not isinstance(bias, (int, float)):
+            continue
+        seconds["content_relevance"].append(scored - started)
+        seconds["bias"].append(done - scored)
+        scores["content_relevance"].append(relevance)
+        scores["bias"].append(bias)
+        kept.append(i)
+    return ({signal: np.array(values) for signal, values in scores.items()},
+            {signal: np.array(values) for signal, values in seconds.items()}, kept)
+
+
+def compare(rows_path, limit, output_path=CALIBRATION_PATH):
+    # Imported here so the checker can import the profiles without a circular import
+    from bulk_score import read_rows
+    from credibility_checker import CredibilityChecker
+
+    default_checker = CredibilityChecker(priority="bulk", profile="default")
+    # Fit on the raw fast scores
+    fast_checker = CredibilityChecker(priority="bulk", profile="fast", allow_uncalibrated=True)
+    fast_checker.calibration = None
+
+    rows = []
+    for _, prompt, url in read_rows(rows_path):
+        if len(rows) >= limit:
+            break
+        try:
+            page = default_checker.fetch_page(url)
+        except Exception as e:
+            print(f"Skipping {url}: {e}", file=sys.stderr)
+            continue
+        rows.append((prompt, url, page))
+    print(f"Scoring {len(rows)} pages with both profiles...", file=sys.stderr)
+
+    default_scores, default_seconds, default_kept = score_pages(default_checker, rows)
+    fast_scores, fast_seconds, fast_kept = score_pages(fast_checker, rows)
+    # Compare (and time) only rows both profiles could score
+    both = sorted(set(default_kept) & set(fast_kept))
+    if len(both) < 2:
+        sys.exit(f"Only {len(both)} of {len(rows)} pages could be scored by both profiles, "
+                 "at least 2 are needed to fit and evaluate the calibration")
+    default_rows = [default_kept.index(i) for i in both]
+    fast_rows = [fast_kept.index(i) for i in both]
+    default_scores = {s: v[default_rows] for s, v in default_scores.items()}
+    fast_scores = {s: v[fast_rows] for s, v in fast_scores.items()}
+    default_seconds = {s: float(v[default_rows].sum()) for s, v in default_seconds.items()}
+    fast_seconds = {s: float(v[fast_rows].sum()) for s, v in fast_seconds.items()}
+
+    # Fit on even rows, evaluate on odd rows so the reported error is not measured on the fitting data
+    fit, held_out = slice(0, None, 2), slice(1, None, 2)
+    calibration = {}
+    print(f"\n{'signal':<19}{'default/s':>10}{'fast/s':>10}{'speedup':>9}"
+          f"{'MAE raw':>9}{'MAE cal':>9}{'final pts':>10}{'rank corr':>10}")
+    for signal, weight in CALIBRATED_SIGNALS.items():
+        fast_knots, default_knots = fit_calibration(fast_scores[signal][fit], default_scores[signal][fit])
+        calibration[signal] = {"fast": fast_knots.tolist(), "default": default_knots.tolist()}
+        truth = default_scores[signal][held_out]
+        raw = fast_scores[signal][held_out]
+        calibrated = np.interp(raw, fast_knots, default_knots)
+        default_rate = len(both) / default_seconds[signal]
+        fast_rate = len(both) / fast_seconds[signal]
+        mae_raw = float(np.mean(np.abs(raw - truth)))
+        mae_calibrated = float(np.mean(np.abs(calibrated - truth)))
+        # Mean change of the final score caused by this signal
+        final_points = mae_calibrated * weight
+        print(f"{signal:<19}{default_rate:>10.1f}{fast_rate:>10.1f}{fast_rate / default_rate:>8.1f}x"
+              f"{mae_raw:>9.2f}{mae_calibrated:>9.2f}{final_points:>10.2f}{rank_correlation(raw, truth):>10.3f}")
+
+    with open(output_path, "w") as f:
+        json.dump({"pages": len(both), "signals": calibration}, f, indent=2)
+    print(f"\nCalibration written to {output_path}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrate the fast model profile and compare it with the default one.")
+    parser.add_argument("rows", help="CSV (with header) or JSONL file of prompt/url rows")
+    parser.add_argument("--limit", type=int, default=500, help="number of pages to score")
+    parser.add_argument("--output", default=CALIBRATION_PATH)
+    args = parser.parse_args()
+    compare(args.rows, args.limit, args.output)
+
+
+if __name__ == "__main__":
+    main()
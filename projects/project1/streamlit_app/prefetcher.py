@@ -0,0 +1,69 @@
+# Background prefetching of work we know we will need soon.
+#
+# The search layer hands over its result list before the user asks for any score, so the
+# checker can start fetching domain signals and pages right away. Work is keyed so the
+# same domain or page is never fetched twice at once: a later prefetch of a key that is
+# still running is ignored, and a scoring call that needs it waits (briefly) for a run that
+# has already started instead of starting its own. A run still queued is cancelled and the
+# scoring call fetches it itself, so prefetching never makes a real request wait in line.
+# A fixed number of workers and a bound on queued work keep speculative fetching from
+# crowding out real requests.
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Prefetcher:
+    """
+    submit(key, fn, *args) runs fn(*args) in the background unless key is already queued
+    or running. pending(key) returns the Future of a queued or running key, else None.
+    wait(key, timeout) returns the result for a caller that needs it now, see below.
+    """
+
+    def __init__(self, max_workers=4, max_pending=64):
+        self.max_pending = max_pending
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self.in_flight = {}  # key -> Future
+        self.lock = threading.Lock()
+        self.stats = {"submitted": 0, "deduplicated": 0, "dropped": 0, "cancelled": 0, "failed": 0}
+
+    def submit(self, key, fn, *args):
+        with self.lock:
+            if key in self.in_flight:
+                self.stats["deduplicated"] += 1
+                return self.in_flight[key]
+            if len(self.in_flight) >= self.max_pending:
+                # Over budget: skip, the scoring call will fetch it itself
+                self.stats["dropped"] += 1
+                return None
+            future = self.executor.submit(fn, *args)
+            self.in_flight[key] = future
+            self.stats["submitted"] += 1
+        future.add_done_callback(lambda f: self._done(key, f))
+        return future
+
+    def _done(self, key, future):
+        with self.lock:
+            self.in_flight.pop(key, None)
+            if future.cancelled():
+                self.stats["cancelled"] += 1
+            elif future.exception() is not None:
+                self.stats["failed"] += 1
+
+    def pending(self, key):
+        with self.lock:
+            return self.in_flight.get(key)
+
+    def wait(self, key, timeout):
+        """
+        Result of the prefetch of key, or None if the caller should fetch it itself:
+        nothing pending, still queued (then cancelled, so it does not run as well),
+        not finished within timeout seconds, or failed.
+        """
+        future = self.pending(key)
+        if future is None or future.cancel():
+            return None
+        try:
+            return future.result(timeout=timeout)
+        except Exception:
+            return None
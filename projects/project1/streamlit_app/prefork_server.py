@@ -0,0 +1,193 @@
+# Pre-fork HTTP server sharing one copy of the model weights between workers.
+#
+# The parent process builds a CredibilityChecker (RoBERTa + MiniLM weights) once and then
+# forks the workers. The weight tensors are never written after loading, so the workers
+# share those pages copy-on-write instead of each holding hundreds of MB of its own.
+# gc.freeze() keeps the garbage collector from touching (and so copying) the parent's objects.
+# The API rate limiters are moved to shared memory first, so all workers draw from one
+# bucket and one daily quota per provider, as the API keys do.
+#
+# Run file using terminal:
+# python prefork_server.py --workers 4 --port 8000
+#   GET /score?prompt=...&url=...   -> credibility_score result as JSON
+#   GET /memory                     -> memory of the worker that answered
+#
+# Memory report (per-worker overhead when each worker loads its own models vs. pre-fork):
+# python prefork_server.py --report --workers 4
+
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import signal
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from credibility_checker import CredibilityChecker
+from upstream import share_limiters
+
+# Loaded in the parent before forking
+checker = None
+
+
+def memory_stats(pid="self"):
+    """
+    Memory of a process in MB from /proc/<pid>/smaps_rollup (Linux):
+    rss (resident), pss (shared pages split between the processes sharing them)
+    and uss (pages private to this process, i.e. what the process really costs).
+    """
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return {
+        "rss": round(fields["Rss"], 1),
+        "pss": round(fields["Pss"], 1),
+        "uss": round(fields["Private_Clean"] + fields["Private_Dirty"], 1)
+    }
+
+
+def warm_up(worker_checker):
+    # Run both models once so the measured memory includes inference buffers
+    worker_checker.similarity_model.encode("warm up")
+    worker_checker.sentiment_analyzer("warm up")
+
+
+class ScoreHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        request = urlparse(self.path)
+        params = parse_qs(request.query)
+        if request.path == "/score" and "prompt" in params and "url" in params:
+            body = checker.credibility_score(params["prompt"][0], params["url"][0])
+        elif request.path == "/memory":
+            body = {"pid": os.getpid(), **memory_stats()}
+        else:
+            self.send_error(404, "Use /score?prompt=...&url=... or /memory")
+            return
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def stop_worker(signum, frame):
+    raise SystemExit
+
+
+def run_worker(server):
+    signal.signal(signal.SIGINT, stop_worker)
+    signal.signal(signal.SIGTERM, stop_worker)
+    try:
+        server.serve_forever()
+    except SystemExit:
+        pass
+    finally:
+        # Ctrl-C reaches both the worker and the parent, which then also sends SIGTERM; finish the flush first
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        # os._exit skips atexit, so write the rows still buffered in the signal store here
+        if checker.signal_store is not None:
+            checker.signal_store.flush()
+        os._exit(0)
+
+
+def serve(port, workers):
+    global checker
+    # Load the models, then bind the socket that every worker accepts on
+    checker = CredibilityChecker()
+    server = ThreadingHTTPServer(("", port), ScoreHandler)
+    share_limiters()
+    # Do not run inference here: forking after torch starts its thread pool can hang the workers
+    gc.collect()
+    gc.freeze()
+
+    children = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            run_worker(server)
+        children.append(pid)
+    print(f"Serving on port {port} with {workers} workers (pids {children})", file=sys.stderr)
+
+    def stop(signum, frame):
+        for pid in children:
+            os.kill(pid, signal.SIGTERM)
+        # Wait for the workers to flush their buffered signal rows
+        for pid in children:
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        sys.exit(0)
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    for pid in children:
+        os.waitpid(pid, 0)
+
+
+def report_worker(results, done):
+    # Pre-fork workers inherit the parent's checker; spawned ones load their own
+    worker_checker = checker if checker is not None else CredibilityChecker()
+    warm_up(worker_checker)
+    results.put(memory_stats())
+    # Stay alive until every worker is measured, so shared pages are split between all of them
+    done.wait()
+
+
+def measure(start_method, workers):
+    context = multiprocessing.get_context(start_method)
+    results, done = context.Queue(), context.Event()
+    processes = [context.Process(target=report_worker, args=(results, done)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    # Loading the models can take a while; give up instead of hanging if a worker died
+    stats = [results.get(timeout=600) for _ in processes]
+    done.set()
+    for process in processes:
+        process.join()
+    return stats
+
+
+def report(workers):
+    global checker
+    print(f"Measuring {workers} workers that each load their own models...", file=sys.stderr)
+    before = measure("spawn", workers)
+
+    print(f"Measuring {workers} workers forked after loading the models once...", file=sys.stderr)
+    checker = CredibilityChecker()
+    gc.collect()
+    gc.freeze()
+    parent = memory_stats()
+    after = measure("fork", workers)
+
+    print(f"\n{'mode':<22}{'worker':>7}{'RSS MB':>10}{'PSS MB':>10}{'USS MB':>10}")
+    for mode, stats in (("own models (before)", before), ("pre-fork (after)", after)):
+        for i, s in enumerate(stats):
+            print(f"{mode:<22}{i:>7}{s['rss']:>10}{s['pss']:>10}{s['uss']:>10}")
+    print(f"{'pre-fork parent':<22}{'':>7}{parent['rss']:>10}{parent['pss']:>10}{parent['uss']:>10}")
+    for mode, stats in (("before", before), ("after", after)):
+        uss = sum(s["uss"] for s in stats) / len(stats)
+        pss = sum(s["pss"] for s in stats)
+        print(f"{mode}: {uss:.1f} MB private per worker, {pss:.1f} MB total PSS for {len(stats)} workers")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-fork credibility scoring server.")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--report", action="store_true", help="print the per-worker memory report and exit")
+    args = parser.parse_args()
+    if args.report:
+        report(args.workers)
+    else:
+        serve(args.port, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# Columnar sink for batch credibility results (Parquet or Arrow IPC).
+#
+# Results are appended one dict at a time into column buffers; every batch_rows rows the
+# buffers become a typed Arrow record batch and are written out, so memory stays bounded
+# however many rows are scored. Star ratings and explanations only take a handful of
+# distinct values and are dictionary-encoded; each keeps one dictionary for the whole
+# file that later batches only extend, as Arrow IPC files require.
+#
+# Arrow IPC files (.arrow) are read back zero-copy from a memory map; Parquet files
+# (.parquet) are smaller but are decoded on read.
+#
+# Convert an existing bulk_score JSONL output using terminal:
+# python result_sink.py results.jsonl results.parquet
+
+import argparse
+import json
+
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+# One row of bulk_score output: credibility_score() plus row, prompt, url (or error)
+RESULT_SCHEMA = pa.schema([
+    ("row", pa.int64()),
+    ("prompt", pa.string()),
+    ("url", pa.string()),
+    ("score", pa.float64()),
+    ("ratings", pa.dictionary(pa.int8(), pa.string())),
+    ("explanation", pa.dictionary(pa.int16(), pa.string())),
+    ("fallbacks", pa.list_(pa.string())),
+    ("degraded", pa.list_(pa.string())),
+    ("error", pa.string())
+])
+
+def file_format(path):
+    if path.endswith(".parquet"):
+        return "parquet"
+    if path.endswith(".arrow"):
+        return "arrow"
+    raise ValueError(f"{path}: use a .parquet or .arrow file")
+
+
+def column_value(field, value):
+    # Non-numeric scores (e.g. a bias error message) are stored as null
+    if pa.types.is_floating(field.type) or pa.types.is_integer(field.type):
+        return value if isinstance(value, (int, float)) else None
+    return value
+
+
+class ResultSink:
+    """
+    with ResultSink("results.parquet") as sink:
+        sink.write(result)
+    Keys missing from a result are written as null; keys not in the schema are ignored.
+    """
+
+    def __init__(self, path, schema=RESULT_SCHEMA, batch_rows=10000):
+        self.path = path
+        self.format = file_format(path)
+        self.schema = schema
+        self.batch_rows = batch_rows
+        self.columns = {field.name: [] for field in schema}
+        # value -> index of every dictionary-encoded column, in order of first appearance
+        self.dictionaries = {field.name: {} for field in schema if pa.types.is_dictionary(field.type)}
+        self.rows = 0
+        if self.format == "parquet":
+            self.writer = pq.ParquetWriter(path, schema, compression="zstd")
+        else:
+            self.writer = ipc.new_file(path, schema, options=ipc.IpcWriteOptions(emit_dictionary_deltas=True))
+
+    def write(self, result):
+        for field in self.schema:
+            value = column_value(field, result.get(field.name))
+            if field.name in self.dictionaries and value is not None:
+                value = self.dictionaries[field.name].setdefault(value, len(self.dictionaries[field.name]))
+            self.columns[field.name].append(value)
+        self.rows += 1
+        if len(self.columns[self.schema[0].name]) >= self.batch_rows:
+            self.flush()
+
+    def flush(self):
+        if not self.columns[self.schema[0].name]:
+            return
+        arrays = []
+        for field in self.schema:
+            if field.name in self.dictionaries:
+                arrays.append(pa.DictionaryArray.from_arrays(
+                    pa.array(self.columns[field.name], type=field.type.index_type),
+                    pa.array(list(self.dictionaries[field.name]), type=field.type.value_type)))
+            else:
+                arrays.append(pa.array(self.columns[field.name], type=field.type))
+        batch = pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+        if self.format == "parquet":
+            self.writer.write_batch(batch)
+        else:
+            self.writer.write(batch)
+        self.columns = {field.name: [] for field in self.schema}
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_results(path, columns=None):
+    """
+    Read a sink file back as a pyarrow Table. Arrow IPC files are memory-mapped, so the
+    columns point straight into the file without copying; Parquet files are decoded.
+    """
+    if file_format(path) == "arrow":
+        table = ipc.open_file(pa.memory_map(path)).read_all()
+        return table.select(columns) if columns else table
+    return pq.read_table(path, columns=columns, memory_map=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert bulk_score JSONL results to Parquet or Arrow.")
+    parser.add_argument("input", help="JSONL results file")
+    parser.add_argument("output", help=".parquet or .arrow file")
+    parser.add_argument("--batch-rows", type=int, default=10000)
+    args = parser.parse_args()
+    with open(args.input, encoding="utf-8") as f, ResultSink(args.output, batch_rows=args.batch_rows) as sink:
+        for line in f:
+            if line.strip():
+                sink.write(json.loads(line))
+    print(f"Wrote {sink.rows} rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
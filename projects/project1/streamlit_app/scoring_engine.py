@@ -0,0 +1,152 @@
+# Single scoring engine shared by deliverable1.py, deliverable2.py and CredibilityChecker.
+#
+# Every signal is declared once below with its inputs, cost class and weight.
+# The engine resolves the dependency graph, computes each shared input (e.g. the page)
+# once, and runs independent nodes in parallel. The functions themselves come from a
+# "backend": any object (a module or a CredibilityChecker) with the named functions.
+
+import contextvars
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+# Cost classes, cheapest first
+COSTS = ("free", "network", "api", "model")
+
+# name: node name; inputs: names of the nodes/run inputs passed positionally to fn;
+# cost: one of COSTS; fn: name of the backend function, or a function of its own.
+# Signals also have a weight and the result key of their raw score ("w_" + key is the weighted score).
+Input = namedtuple("Input", ["name", "inputs", "cost", "fn"])
+Signal = namedtuple("Signal", ["name", "inputs", "cost", "weight", "fn", "key"])
+
+# Given to every run
+RUN_INPUTS = ("url", "prompt")
+
+# Split of the domain trust score between its three sub-scores
+DOMAIN_TRUST_WEIGHTS = {
+    "safety": 0.4,
+    "domain_age": 0.3,
+    "popularity": 0.3
+}
+
+
+def combine_domain_trust(safety_score, domain_age_score, popularity_score):
+    final_trust_score = ((safety_score * DOMAIN_TRUST_WEIGHTS["safety"]) +
+                         (domain_age_score * DOMAIN_TRUST_WEIGHTS["domain_age"]) +
+                         (popularity_score * DOMAIN_TRUST_WEIGHTS["popularity"]))
+    return round(final_trust_score, 2)
+
+
+def score_domain_trust(domain_scores):
+    return combine_domain_trust(*domain_scores)
+
+
+INPUTS = [
+    # (safety, domain age, popularity) scores
+    Input("domain_scores", ("url",), "api", "get_domain_scores"),
+    Input("page", ("url",), "network", "fetch_page")
+]
+
+SIGNALS = [
+    Signal("domain_trust", ("domain_scores",), "free", 0.275, score_domain_trust, "domain_trust"),
+    Signal("content_relevance", ("url", "prompt", "page"), "model", 0.275, "get_content_relevance_score", "relevance_score"),
+    Signal("fact_check", ("prompt",), "api", 0.275, "get_fact_check_score", "fact_check"),
+    Signal("bias", ("url", "page"), "model", 0.125, "get_bias_score", "bias_score"),
+    Signal("citation", ("prompt",), "api", 0.05, "get_citation_score", "citation_score")
+]
+
+# WEIGHTS MAPPING:
+WEIGHTS = {signal.name: signal.weight for signal in SIGNALS}
+
+
+class ScoringEngine:
+    """
+    Run the SIGNALS registry against a backend.
+
+    run(prompt, url) returns {signal name: raw score}.
+    iter_run(prompt, url) yields (signal name, raw score) in completion order;
+    pass a values dict to also get the inputs (e.g. domain_scores) once the run finishes.
+    compile_scores(url, raw) applies WEIGHTS and returns the validate_url dict;
+    signals missing from raw (skipped under load) get None and the others' weights are renormalized.
+    """
+
+    def __init__(self, backend, signals=SIGNALS, inputs=INPUTS, max_workers=8):
+        self.backend = backend
+        self.signals = {signal.name: signal for signal in signals}
+        self.nodes = {node.name: node for node in list(inputs) + list(signals)}
+        self.weights = {signal.name: signal.weight for signal in signals}
+        self.max_workers = max_workers
+        for node in self.nodes.values():
+            for name in node.inputs:
+                if name not in self.nodes and name not in RUN_INPUTS:
+                    raise ValueError(f"{node.name} depends on unknown input {name}")
+
+    def required_nodes(self, names):
+        # The named signals plus every node they depend on
+        required = set()
+        stack = list(names)
+        while stack:
+            name = stack.pop()
+            if name in required or name in RUN_INPUTS:
+                continue
+            required.add(name)
+            stack.extend(self.nodes[name].inputs)
+        return required
+
+    def iter_run(self, prompt, url, signals=None, context=None, values=None):
+        # Nodes run in copies of context (default: the caller's), so context variables reach the worker threads
+        if context is None:
+            context = contextvars.copy_context()
+        values = {} if values is None else values
+        values.update({"url": url, "prompt": prompt})
+        remaining = self.required_nodes(signals or self.signals)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            running = {}
+
+            def start_ready_nodes():
+                # Cheapest ready nodes are submitted first
+                ready = [name for name in remaining if all(i in values for i in self.nodes[name].inputs)]
+                for name in sorted(ready, key=lambda n: COSTS.index(self.nodes[n].cost)):
+                    node = self.nodes[name]
+                    fn = node.fn if callable(node.fn) else getattr(self.backend, node.fn)
+                    args = [values[i] for i in node.inputs]
+                    running[executor.submit(context.copy().run, fn, *args)] = name
+                    remaining.discard(name)
+
+            start_ready_nodes()
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    values[name] = future.result()
+                    if name in self.signals:
+                        yield name, values[name]
+                start_ready_nodes()
+
+    def run(self, prompt, url, signals=None, context=None, values=None):
+        return dict(self.iter_run(prompt, url, signals, context, values))
+
+    def signal_weights(self, names):
+        # Weights of the named signals, scaled up to sum to the full weight when some signals are skipped
+        names = set(names)
+        if names == set(self.weights):
+            return self.weights
+        total = sum(self.weights[name] for name in names)
+        return {name: self.weights[name] / total for name in names}
+
+    def weighted_score(self, name, score, weights=None):
+        return round(score * (weights or self.weights)[name], 2)
+
+    def compile_scores(self, url, raw):
+        weights = self.signal_weights(name for name in self.signals if name in raw)
+        result = {"url": url}
+        weighted = []
+        for signal in self.signals.values():
+            if signal.name in raw:
+                result[signal.key] = raw[signal.name]
+                result["w_" + signal.key] = self.weighted_score(signal.name, raw[signal.name], weights)
+                weighted.append(result["w_" + signal.key])
+            else:
+                result[signal.key] = result["w_" + signal.key] = None
+        result["final_score"] = round(sum(weighted), 2)
+        return result
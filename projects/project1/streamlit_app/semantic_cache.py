@@ -0,0 +1,116 @@
+# Semantic cache for prompt-only signals (fact check and citation scores).
+#
+# The same question phrased differently would otherwise trigger new Fact Check and
+# SerpAPI calls. Each prompt is embedded with the MiniLM model the checker already has
+# loaded and compared (cosine similarity) to the prompts seen before; above the threshold
+# the earlier result is reused.
+#
+# A small share of hits is audited: the signal is computed anyway and compared with the
+# reused value, which gives the false-reuse rate used to tune the threshold.
+
+import random
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+class SemanticPromptCache:
+    """
+    get_or_compute(prompt, key, compute) returns the cached value of key ("fact_check",
+    "citation", ...) for the most similar earlier prompt, or compute() on a miss.
+    compute() returns (value, cacheable); values that are not cacheable are not stored.
+    """
+
+    def __init__(self, model, threshold=0.92, max_entries=10000, audit_rate=0.05):
+        self.model = model
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.audit_rate = audit_rate
+        self.vectors = None  # max_entries x dim, filled lazily once the dimension is known
+        self.prompts = [None] * max_entries
+        self.results = [{} for _ in range(max_entries)]
+        self.has_key = {}  # key -> boolean mask of the slots holding a value for it
+        self.slots = {}  # prompt -> slot
+        self.next_slot = 0  # slots are reused oldest first once the cache is full
+        self.embeddings = OrderedDict()  # recent prompt -> vector, so both signals embed a prompt once
+        self.lock = threading.Lock()
+        self.counts = {"lookups": 0, "hits": 0, "audits": 0, "false_reuses": 0}
+
+    def embed(self, prompt):
+        with self.lock:
+            if prompt in self.embeddings:
+                return self.embeddings[prompt]
+        vector = self.model.encode(prompt, convert_to_numpy=True, normalize_embeddings=True).astype(np.float32)
+        with self.lock:
+            self.embeddings[prompt] = vector
+            if len(self.embeddings) > 256:
+                self.embeddings.popitem(last=False)
+        return vector
+
+    def nearest(self, vector, key):
+        # Called with the lock held; most similar stored prompt that has a value for key
+        if key not in self.has_key:
+            return None, 0
+        similarities = self.vectors @ vector
+        similarities[~self.has_key[key]] = -1
+        slot = int(np.argmax(similarities))
+        return slot, float(similarities[slot])
+
+    def store(self, prompt, vector, key, value):
+        with self.lock:
+            if self.vectors is None:
+                self.vectors = np.zeros((self.max_entries, len(vector)), dtype=np.float32)
+            slot = self.slots.get(prompt)
+            if slot is None:
+                slot = self.next_slot
+                self.next_slot = (self.next_slot + 1) % self.max_entries
+                self.slots.pop(self.prompts[slot], None)
+                for mask in self.has_key.values():
+                    mask[slot] = False
+                self.prompts[slot] = prompt
+                self.results[slot] = {}
+                self.vectors[slot] = vector
+                self.slots[prompt] = slot
+            self.results[slot][key] = value
+            self.has_key.setdefault(key, np.zeros(self.max_entries, dtype=bool))[slot] = True
+
+    def peek(self, prompt, key):
+        # Cached value for a near-duplicate prompt, or None; never computes or audits
+        vector = self.embed(prompt)
+        with self.lock:
+            slot, similarity = self.nearest(vector, key)
+            if slot is not None and similarity >= self.threshold:
+                return self.results[slot][key]
+        return None
+
+    def get_or_compute(self, prompt, key, compute):
+        vector = self.embed(prompt)
+        with self.lock:
+            self.counts["lookups"] += 1
+            slot, similarity = self.nearest(vector, key)
+            hit = slot is not None and similarity >= self.threshold
+            if hit:
+                self.counts["hits"] += 1
+                cached = self.results[slot][key]
+                audit = random.random() < self.audit_rate
+        if hit and not audit:
+            return cached
+
+        value, cacheable = compute()
+        # A value that is not cacheable (e.g. an API default) says nothing about the cached one
+        if hit and cacheable:
+            with self.lock:
+                self.counts["audits"] += 1
+                if value != cached:
+                    self.counts["false_reuses"] += 1
+        if cacheable:
+            self.store(prompt, vector, key, value)
+        return value
+
+    def report(self):
+        with self.lock:
+            counts = dict(self.counts)
+        counts["hit_rate"] = round(counts["hits"] / counts["lookups"], 3) if counts["lookups"] else None
+        counts["false_reuse_rate"] = round(counts["false_reuses"] / counts["audits"], 3) if counts["audits"] else None
+        return counts
@@ -0,0 +1,163 @@
+# Columnar store of the raw sub-scores of every check, for re-weighting without recomputation.
+#
+# Each check appends one row: the raw safety, domain age, popularity, relevance, fact-check,
+# bias and citation scores, keyed by prompt, url and model version. Rows are buffered and
+# written as immutable segments, one .npy file per column, so loading a column for millions
+# of rows is a memory map and rescore() recomputes every final score with numpy in one pass.
+#
+# Rescore using terminal (weights not given keep their current value):
+# python signal_store.py signal_store --weights '{"bias": 0.1, "citation": 0.075}' --domain-weights '{"safety": 0.5, "domain_age": 0.25, "popularity": 0.25}'
+
+import argparse
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from scoring_engine import WEIGHTS, DOMAIN_TRUST_WEIGHTS
+
+# Raw score columns, float64 so rescoring rounds exactly like the checker; a non-numeric score
+# (e.g. a bias error message) is stored as NaN. Checks degraded under load or that used a default
+# score for an unavailable service are not stored at all.
+SCORE_COLUMNS = ("safety", "domain_age", "popularity", "content_relevance", "fact_check", "bias", "citation")
+
+# Star ratings as in CredibilityChecker.get_star_ratings, indexed by 2 * full stars + half star
+STAR_RATINGS = np.array(["★" * (i // 2) + "⯨" * (i % 2) + "☆" * (5 - i // 2 - i % 2) for i in range(11)])
+
+
+def row_key(prompt, url, model_version):
+    digest = hashlib.blake2b(f"{prompt}\0{url}\0{model_version}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def as_score(value):
+    return float(value) if isinstance(value, (int, float)) else float("nan")
+
+
+class SignalStore:
+    """
+    append(prompt, url, model_version, raw) buffers one row; flush() writes the buffer
+    as a new segment. load() returns every column (scores, key, checked_at, prompt, url,
+    model_version) concatenated over all segments.
+    """
+
+    def __init__(self, path, flush_rows=10000):
+        self.path = path
+        self.flush_rows = flush_rows
+        self.buffer = []
+        self.lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        atexit.register(self.flush)
+
+    def append(self, prompt, url, model_version, raw):
+        row = (row_key(prompt, url, model_version), time.time(), prompt, url, model_version,
+               *(as_score(raw.get(column)) for column in SCORE_COLUMNS))
+        with self.lock:
+            self.buffer.append(row)
+            full = len(self.buffer) >= self.flush_rows
+        if full:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            rows, self.buffer = self.buffer, []
+        if not rows:
+            return
+        columns = list(zip(*rows))
+        segment = os.path.join(self.path, f"segment-{time.time_ns()}-{os.getpid()}")
+        # Written under a temporary name and renamed, so readers never see half a segment
+        os.makedirs(segment + ".tmp")
+        np.save(os.path.join(segment + ".tmp", "key.npy"), np.array(columns[0], dtype=np.uint64))
+        np.save(os.path.join(segment + ".tmp", "checked_at.npy"), np.array(columns[1], dtype=np.float64))
+        for i, name in enumerate(("prompt", "url", "model_version")):
+            np.save(os.path.join(segment + ".tmp", f"{name}.npy"), np.array(columns[2 + i], dtype=str))
+        for i, name in enumerate(SCORE_COLUMNS):
+            np.save(os.path.join(segment + ".tmp", f"{name}.npy"), np.array(columns[5 + i], dtype=np.float64))
+        os.rename(segment + ".tmp", segment)
+
+    def segments(self):
+        return sorted(os.path.join(self.path, name) for name in os.listdir(self.path)
+                      if name.startswith("segment-") and not name.endswith(".tmp"))
+
+    def load(self, columns=SCORE_COLUMNS + ("key",), latest_only=True):
+        """
+        Concatenate the requested columns over all segments, oldest first.
+        With latest_only, only the newest row of each (prompt, url, model_version) key is kept.
+        """
+        names = set(columns) | ({"key"} if latest_only else set())
+        parts = {name: [] for name in names}
+        for segment in self.segments():
+            for name in names:
+                parts[name].append(np.load(os.path.join(segment, f"{name}.npy"), mmap_mode="r"))
+        data = {name: np.concatenate(arrays) if arrays else np.empty(0) for name, arrays in parts.items()}
+        if latest_only and len(data["key"]):
+            # Index of the last occurrence of each key
+            _, first_from_end = np.unique(data["key"][::-1], return_index=True)
+            keep = np.sort(len(data["key"]) - 1 - first_from_end)
+            data = {name: array[keep] for name, array in data.items()}
+        return {name: data[name] for name in columns}
+
+
+def round_cents(values):
+    # np.round(x, 2) rounds x * 100 half to even, which differs from round(x, 2) on values like 12.925;
+    # close to a half cent, fall back to Python's round() so rescored values match the checker exactly
+    values = np.asarray(values, dtype=np.float64)
+    scaled = values * 100
+    rounded = np.round(scaled) / 100
+    near_half = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    rounded[near_half] = [round(float(value), 2) for value in values[near_half]]
+    return rounded
+
+
+def rescore(data, weights=WEIGHTS, domain_weights=DOMAIN_TRUST_WEIGHTS):
+    """
+    Recompute domain trust, final scores and star ratings for loaded columns under new weights,
+    rounded to cents like the checker. Returns (domain_trust, final_score, ratings) arrays.
+    """
+    domain_trust = round_cents(data["safety"] * domain_weights["safety"] +
+                               data["domain_age"] * domain_weights["domain_age"] +
+                               data["popularity"] * domain_weights["popularity"])
+    raw = {
+        "domain_trust": domain_trust,
+        "content_relevance": data["content_relevance"],
+        "fact_check": data["fact_check"],
+        "bias": data["bias"],
+        "citation": data["citation"]
+    }
+    final_score = round_cents(sum(round_cents(raw[name] * weight) for name, weight in weights.items()))
+    stars = final_score / 100 * 5
+    full_stars = np.clip(np.trunc(np.nan_to_num(stars)), 0, 5)
+    half_star = (stars - full_stars >= 0.5) & (full_stars < 5)
+    ratings = STAR_RATINGS[(full_stars * 2 + half_star).astype(int)]
+    return domain_trust, final_score, ratings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rescore every stored check under new weights.")
+    parser.add_argument("store", help="signal store directory")
+    parser.add_argument("--weights", default="{}", help="JSON of signal weights to change")
+    parser.add_argument("--domain-weights", default="{}", help="JSON of domain trust sub-weights to change")
+    parser.add_argument("--output", help="optional .npz file for the new domain_trust, final_score and ratings")
+    args = parser.parse_args()
+
+    started = time.time()
+    data = SignalStore(args.store).load()
+    loaded = time.time()
+    domain_trust, final_score, ratings = rescore(data, {**WEIGHTS, **json.loads(args.weights)},
+                                                 {**DOMAIN_TRUST_WEIGHTS, **json.loads(args.domain_weights)})
+    done = time.time()
+    print(f"Rescored {len(final_score)} rows: load {loaded - started:.2f}s, rescore {done - loaded:.2f}s")
+    if len(final_score):
+        print(f"Mean final score {np.nanmean(final_score):.2f}")
+        for rating, count in zip(*np.unique(ratings, return_counts=True)):
+            print(f"  {rating}: {count}")
+    if args.output:
+        np.savez(args.output, key=data["key"], domain_trust=domain_trust, final_score=final_score, ratings=ratings)
+
+
+if __name__ == "__main__":
+    main()
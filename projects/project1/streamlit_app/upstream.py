@@ -0,0 +1,206 @@
+# Protection for the paid upstream APIs (Safe Browsing, Fact Check, WHOISXML, SerpAPI).
+#
+# RateLimiter: per-provider token bucket, daily quota and priority lanes, so bursts
+#              wait in a queue instead of failing and interactive checks go first.
+# CircuitBreaker: closed / open / half-open breaker, so a failing provider is skipped
+#                 right away and the checker falls back to its neutral default.
+
+import contextlib
+import contextvars
+import heapq
+import itertools
+import multiprocessing
+import threading
+import time
+from datetime import datetime, timezone
+
+
+# Lower number is served first. Each lane has its own maximum queueing time in seconds.
+# "prefetch" is speculative work (see CredibilityChecker.prefetch): it only takes a token that is
+# free right now and never queues, since the check will fetch what it still needs itself.
+PRIORITIES = {
+    "interactive": (0, 10),
+    "bulk": (1, 300),
+    "prefetch": (2, 0)
+}
+
+# Requests per second, burst size and calls per day of each provider.
+# Adjust to the plan of each API key; None means no daily quota.
+PROVIDER_LIMITS = {
+    "safe_browsing": {"rate": 10, "burst": 20, "daily_quota": 10000},
+    "fact_check": {"rate": 5, "burst": 10, "daily_quota": 10000},
+    "whois": {"rate": 2, "burst": 5, "daily_quota": 1000},
+    "serpapi": {"rate": 1, "burst": 3, "daily_quota": 250}
+}
+
+# Consecutive failures that open a circuit, and seconds before a trial call is let through
+FAILURE_THRESHOLD = 5
+RESET_TIMEOUT = 30
+
+
+class RateLimiter:
+    """
+    Token bucket with a daily quota. Callers wait in a priority queue for a token,
+    interactive callers ahead of bulk ones, and give up after their lane's timeout.
+    After share(), the bucket and quota live in shared memory and are drawn from by
+    every process forked afterwards.
+    """
+
+    # Indexes into state
+    TOKENS, UPDATED, DAY, USED_TODAY = range(4)
+
+    def __init__(self, rate, burst, daily_quota=None):
+        self.rate = rate
+        self.burst = burst
+        self.daily_quota = daily_quota
+        # tokens, last refill (monotonic, the same clock in every process), day (ordinal), calls used today
+        self.state = [burst, time.monotonic(), 0, 0]
+        self.state_lock = contextlib.nullcontext()
+        self.waiters = []  # heap of (priority, ticket), within this process
+        self.tickets = itertools.count()
+        self.lock = threading.Condition()
+
+    def share(self):
+        # Call before forking; the workers then share one bucket and one daily quota
+        self.state = multiprocessing.RawArray("d", self.state)
+        self.state_lock = multiprocessing.Lock()
+
+    def _refill(self):
+        # Called with state_lock held
+        state = self.state
+        now = time.monotonic()
+        state[self.TOKENS] = min(self.burst, state[self.TOKENS] + (now - state[self.UPDATED]) * self.rate)
+        state[self.UPDATED] = now
+        today = datetime.now(timezone.utc).date().toordinal()
+        if today != state[self.DAY]:
+            state[self.DAY] = today
+            state[self.USED_TODAY] = 0
+
+    def quota_left(self):
+        with self.lock, self.state_lock:
+            self._refill()
+            if self.daily_quota is None:
+                return None
+            return max(self.daily_quota - int(self.state[self.USED_TODAY]), 0)
+
+    def acquire(self, priority="interactive"):
+        """
+        Block until a call may be made. Return False if the daily quota is used up
+        or no token became available within the lane's timeout.
+        """
+        rank, timeout = PRIORITIES[priority]
+        deadline = time.monotonic() + timeout
+        waiter = (rank, next(self.tickets))
+        with self.lock:
+            heapq.heappush(self.waiters, waiter)
+            try:
+                while True:
+                    with self.state_lock:
+                        self._refill()
+                        if self.daily_quota is not None and self.state[self.USED_TODAY] >= self.daily_quota:
+                            return False
+                        tokens = self.state[self.TOKENS]
+                        if self.waiters[0] == waiter and tokens >= 1:
+                            self.state[self.TOKENS] = tokens - 1
+                            self.state[self.USED_TODAY] += 1
+                            return True
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    # Sleep until the next token is due (or until woken by another waiter)
+                    self.lock.wait(min(remaining, max((1 - tokens) / self.rate, 0.001)))
+            finally:
+                self.waiters.remove(waiter)
+                heapq.heapify(self.waiters)
+                self.lock.notify_all()
+
+
+class CircuitBreaker:
+    """
+    closed: calls go through; FAILURE_THRESHOLD consecutive failures open the circuit.
+    open: calls are refused until RESET_TIMEOUT seconds have passed.
+    half-open: a single trial call goes through; success closes the circuit, failure reopens it.
+    """
+
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0
+        self.trial_running = False
+        self.lock = threading.Lock()
+
+    def allow(self):
+        with self.lock:
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half-open"
+            if self.state == "closed":
+                return True
+            if self.state == "half-open" and not self.trial_running:
+                self.trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.state = "closed"
+            self.failures = 0
+            self.trial_running = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.trial_running = False
+            if self.state == "half-open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+
+# List that call_upstream adds skipped providers to when no fallbacks list is passed
+current_fallbacks = contextvars.ContextVar("current_fallbacks", default=None)
+# Lane that overrides the caller's priority, set for prefetch work
+current_priority = contextvars.ContextVar("current_priority", default=None)
+
+# Shared by every checker in the process, since the quotas belong to the API keys
+LIMITERS = {provider: RateLimiter(**limits) for provider, limits in PROVIDER_LIMITS.items()}
+BREAKERS = {provider: CircuitBreaker() for provider in PROVIDER_LIMITS}
+
+
+def share_limiters():
+    # Called by a server before it forks its workers, so the quotas are not multiplied by the worker count
+    for limiter in LIMITERS.values():
+        limiter.share()
+
+
+def call_upstream(provider, fn, priority="interactive", fallbacks=None):
+    """
+    Call fn() through the provider's circuit breaker and rate limiter.
+    Return its result, or None if the circuit is open, the call was not allowed
+    by the rate limiter, or fn raised. In those cases the provider is added to fallbacks
+    (or to current_fallbacks if fallbacks is None). current_priority, if set, replaces priority.
+    """
+    if fallbacks is None:
+        fallbacks = current_fallbacks.get()
+    priority = current_priority.get() or priority
+    breaker = BREAKERS[provider]
+    if not breaker.allow():
+        reason = "circuit open"
+    elif not LIMITERS[provider].acquire(priority):
+        # Not the provider's fault, so let a half-open trial be retried
+        with breaker.lock:
+            breaker.trial_running = False
+        reason = "rate limited"
+    else:
+        try:
+            result = fn()
+        except Exception as e:
+            breaker.record_failure()
+            reason = f"error: {e}"
+        else:
+            breaker.record_success()
+            return result
+    print(f"{provider} unavailable ({reason}), using default score")
+    if fallbacks is not None:
+        fallbacks.append(provider)
+    return None